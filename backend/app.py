@@ -8,8 +8,9 @@ from fastapi import FastAPI
 
 # Import after environment is loaded
 from config import API_DESCRIPTION, API_TITLE, API_VERSION
-from core import lifespan, run_server, track_activity_middleware
+from core import ActivityMiddleware, lifespan, run_server
 from routes import (
+    AudioFastPath,
     configs_router,
     game_router,
     player_router,
@@ -32,7 +33,9 @@ def create_app() -> FastAPI:
     )
 
     # Register middleware
-    app.middleware("http")(track_activity_middleware)
+    app.add_middleware(ActivityMiddleware)
+    # Added last so it runs first: track files skip the middleware above
+    app.add_middleware(AudioFastPath)
 
     # Register routers
     app.include_router(configs_router)
@@ -4,7 +4,7 @@ a = Analysis(
     ['app.py'],
     pathex=[],
     binaries=[],
-    datas=[('ffmpeg', 'ffmpeg'), ('yt-dlp.exe', '.'), ('prompts.json', '.')],
+    datas=[('ffmpeg', 'ffmpeg'), ('yt-dlp.exe', '.'), ('prompts.json', '.'), ('catalog.json', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
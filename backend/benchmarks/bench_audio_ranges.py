@@ -0,0 +1,148 @@
+"""
+Benchmark concurrent range requests against the track endpoints.
+
+Compares the regular route (http-decorator activity middleware, as before
+the raw ASGI middleware, + routing + FileResponse) with the raw ASGI fast
+path, each served by uvicorn on a local port.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_audio_ranges --requests 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+
+from core.monitoring import update_activity
+from core.server import get_available_port
+from music.queue import PlaybackQueue
+from routes import AudioFastPath, player_router
+from routes.player import music_player_service
+
+
+async def decorator_activity_middleware(request: Request, call_next):
+    """Previous implementation: BaseHTTPMiddleware via app.middleware("http")."""
+    update_activity()
+    return await call_next(request)
+
+
+def build_app(fast_path: bool) -> FastAPI:
+    """Build a minimal app with the player routes (no background services)."""
+    app = FastAPI()
+    app.middleware("http")(decorator_activity_middleware)
+    if fast_path:
+        app.add_middleware(AudioFastPath)
+    app.include_router(player_router)
+    return app
+
+
+def start_server(app: FastAPI) -> tuple:
+    """Run an app with uvicorn in a background thread."""
+    port = get_available_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, port
+
+
+def make_track(size_mb: int) -> tuple:
+    """Create a random audio-sized file and add it to the playback queue."""
+    path = Path(tempfile.gettempdir()) / "bench_audio_ranges.mp3"
+    path.write_bytes(os.urandom(size_mb * 1024 * 1024))
+    track = PlaybackQueue().add_to_queue(str(path))
+    music_player_service.ensure_etag(track)
+    return path, track
+
+
+def range_header(size: int, span: int, parts: int) -> str:
+    """Build a Range header with random, non-overlapping spans."""
+    starts = sorted(random.sample(range(0, size - span, span), parts))
+    return "bytes=" + ",".join(f"{s}-{s + span - 1}" for s in starts)
+
+
+async def run_load(
+    url: str, size: int, args: argparse.Namespace, parts: int
+) -> List[float]:
+    """Issue range requests with bounded concurrency and collect latencies."""
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    span = args.range_kb * 1024
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+
+        async def one() -> None:
+            async with semaphore:
+                headers = {"Range": range_header(size, span, parts)}
+                start = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 206, response.status_code
+
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+
+    return latencies
+
+
+def report(name: str, latencies: List[float], elapsed: float) -> None:
+    """Print throughput and latency percentiles."""
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{name:<28} {len(ordered) / elapsed:>9.0f} req/s"
+        f"   p50 {statistics.median(ordered) * 1000:>7.2f} ms"
+        f"   p95 {p95 * 1000:>7.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--size-mb", type=int, default=8)
+    parser.add_argument("--range-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    path, track = make_track(args.size_mb)
+    size = path.stat().st_size
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"{args.range_kb} KiB ranges of a {args.size_mb} MiB file\n"
+    )
+
+    try:
+        for fast_path in (False, True):
+            server, thread, port = start_server(build_app(fast_path))
+            url = f"http://127.0.0.1:{port}/player/tracks/{track.id}?v={track.etag}"
+            label = "fast path" if fast_path else "route + middleware"
+
+            for parts in (1, 4):
+                start = time.perf_counter()
+                latencies = asyncio.run(run_load(url, size, args, parts))
+                elapsed = time.perf_counter() - start
+                name = f"{label} ({parts} range{'s' * (parts > 1)})"
+                report(name, latencies, elapsed)
+
+            server.should_exit = True
+            thread.join()
+    finally:
+        path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
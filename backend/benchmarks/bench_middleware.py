@@ -0,0 +1,101 @@
+"""
+Benchmark activity tracking as http-decorator middleware vs raw ASGI.
+
+Measures requests per second and time to first byte for /ping and
+/player/next, each app served by uvicorn on a local port.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_middleware --requests 5000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.bench_audio_ranges import decorator_activity_middleware, start_server
+from core.middleware import ActivityMiddleware
+from music.queue import PlaybackQueue
+from routes import player_router
+
+
+def build_app(raw_asgi: bool) -> FastAPI:
+    """Build a minimal app with /ping and the player routes."""
+    app = FastAPI()
+    if raw_asgi:
+        app.add_middleware(ActivityMiddleware)
+    else:
+        app.middleware("http")(decorator_activity_middleware)
+    app.include_router(player_router)
+
+    @app.get("/ping")
+    async def health_check():
+        return {"status": "ok", "message": "pong"}
+
+    return app
+
+
+async def run_load(url: str, args: argparse.Namespace) -> List[float]:
+    """Issue requests with bounded concurrency and collect TTFB samples."""
+    ttfb: List[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+
+        async def one() -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                async with client.stream("GET", url) as response:
+                    ttfb.append(time.perf_counter() - start)
+                    await response.aread()
+                assert response.status_code < 400, response.status_code
+
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+
+    return ttfb
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    # /player/next needs something to advance to
+    paths = []
+    for i in range(8):
+        path = Path(tempfile.gettempdir()) / f"bench_middleware_{i}.mp3"
+        path.write_bytes(b"\0" * 4096)
+        PlaybackQueue().add_to_queue(str(path))
+        paths.append(path)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}\n")
+    try:
+        for endpoint in ("/ping", "/player/next"):
+            for raw_asgi in (False, True):
+                server, thread, port = start_server(build_app(raw_asgi))
+                start = time.perf_counter()
+                ttfb = asyncio.run(run_load(f"http://127.0.0.1:{port}{endpoint}", args))
+                elapsed = time.perf_counter() - start
+                server.should_exit = True
+                thread.join()
+
+                label = "raw ASGI" if raw_asgi else "http middleware"
+                print(
+                    f"{endpoint:<14} {label:<16} {len(ttfb) / elapsed:>8.0f} req/s"
+                    f"   TTFB p50 {statistics.median(ttfb) * 1000:>6.2f} ms"
+                )
+    finally:
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
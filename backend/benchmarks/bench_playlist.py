@@ -0,0 +1,61 @@
+"""
+Benchmark playlist generation with sequential vs parallel theme expansion.
+
+Always uses the two-stage prompts, whatever mode the model is configured for.
+
+Calls the configured LLM (config.json) for real, so each run spends API
+quota: one theme analysis plus one request per theme, per round and mode.
+Use --backend fake (simulated latency) or replay (a recorded cassette) to
+run offline.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_playlist --champion Yasuo --rounds 3
+    python -m benchmarks.bench_playlist --backend record --rounds 1
+    python -m benchmarks.bench_playlist --backend replay
+"""
+
+import argparse
+import statistics
+import time
+
+from music.dj_lol import MODO_ETAPAS, gerar_playlist
+from music.llm_backends import BACKENDS
+from music.llm_provider import LLMProvider
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--champion", default="Yasuo")
+    parser.add_argument("--tracks", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--backend", choices=BACKENDS, help="override LLM_BACKEND")
+    args = parser.parse_args()
+
+    if args.backend:
+        LLMProvider().set_backend(args.backend)
+
+    print(f"{args.champion}, {args.tracks} tracks, {args.rounds} rounds\n")
+    for paralelo in (False, True):
+        durations = []
+        sizes = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            playlist = gerar_playlist(
+                args.champion,
+                total_alvo=args.tracks,
+                paralelo=paralelo,
+                modo=MODO_ETAPAS,
+            )
+            durations.append(time.perf_counter() - start)
+            sizes.append(len(playlist))
+
+        label = "parallel" if paralelo else "sequential"
+        print(
+            f"{label:<12} p50 {statistics.median(durations):>6.2f} s"
+            f"   max {max(durations):>6.2f} s"
+            f"   tracks {min(sizes)}-{max(sizes)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark the single-call playlist prompt against the two-stage prompts.
+
+Reports latency, token usage and result diversity per mode: distinct
+tracks and artists per playlist, and the mean overlap (Jaccard) between
+playlists of different rounds. Calls the LLM for real, so each run spends
+API quota, unless --backend picks the fake or replay backend.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_prompt_modes --champion Yasuo --rounds 3
+    python -m benchmarks.bench_prompt_modes --model llama-3.1-8b-instant
+    python -m benchmarks.bench_prompt_modes --backend fake
+"""
+
+import argparse
+import itertools
+import json
+import statistics
+import time
+from typing import List
+
+from langchain_core.callbacks import get_usage_metadata_callback
+
+from music import dj_lol
+from music.dj_lol import MODO_ETAPAS, MODO_UNICO, gerar_playlist
+from music.llm_backends import BACKENDS
+from music.llm_provider import LLMProvider
+
+
+def artist(query: str) -> str:
+    """Artist part of a "Track - Artist" query (whole query if unsplittable)."""
+    return query.rsplit(" - ", 1)[-1].strip().lower()
+
+
+def jaccard(a: List[str], b: List[str]) -> float:
+    """Overlap between two playlists, 0 (disjoint) to 1 (same tracks)."""
+    a, b = {q.lower() for q in a}, {q.lower() for q in b}
+    return len(a & b) / len(a | b) if a | b else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--champion", default="Yasuo")
+    parser.add_argument("--tracks", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--model", help="override the model from config.json")
+    parser.add_argument("--backend", choices=BACKENDS, help="override LLM_BACKEND")
+    args = parser.parse_args()
+
+    provider = LLMProvider()
+    if args.backend:
+        provider.set_backend(args.backend)
+    if args.model:
+        config = provider.get_config()
+        provider.get_config = lambda: {**config, "model": args.model}
+
+    print(
+        f"{args.champion}, {args.tracks} tracks, {args.rounds} rounds, "
+        f"model {dj_lol.get_model_name()} "
+        f"(configured mode: {dj_lol.get_prompt_mode()})\n"
+    )
+    for modo in (MODO_ETAPAS, MODO_UNICO):
+        durations, playlists = [], []
+        input_tokens = output_tokens = 0
+        for _ in range(args.rounds):
+            with get_usage_metadata_callback() as usage:
+                start = time.perf_counter()
+                playlists.append(
+                    gerar_playlist(args.champion, total_alvo=args.tracks, modo=modo)
+                )
+                durations.append(time.perf_counter() - start)
+            for model_usage in usage.usage_metadata.values():
+                input_tokens += model_usage["input_tokens"]
+                output_tokens += model_usage["output_tokens"]
+
+        overlaps = [jaccard(a, b) for a, b in itertools.combinations(playlists, 2)]
+        result = {
+            "p50_s": round(statistics.median(durations), 2),
+            "input_tokens": input_tokens // args.rounds,
+            "output_tokens": output_tokens // args.rounds,
+            "tracks": statistics.mean(len(p) for p in playlists),
+            "distinct_tracks": statistics.mean(
+                len({q.lower() for q in p}) for p in playlists
+            ),
+            "distinct_artists": statistics.mean(
+                len({artist(q) for q in p}) for p in playlists
+            ),
+            "overlap": round(statistics.mean(overlaps), 3) if overlaps else None,
+        }
+        print(f"{modo:<10} {json.dumps(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ from .settings import (
     INACTIVITY_TIMEOUT,
     LOG_LEVEL,
     PORT_FILE_NAME,
+    QUEUE_PERSISTENCE_ENABLED,
 )
 
 __all__ = [
@@ -28,4 +29,5 @@ __all__ = [
     "API_VERSION",
     "LOG_LEVEL",
     "ACCESS_LOG_ENABLED",
+    "QUEUE_PERSISTENCE_ENABLED",
 ]
@@ -6,6 +6,7 @@ Centralizes all configuration values for easy maintenance.
 # Server configuration
 from pathlib import Path
 import sys
+import tempfile
 
 
 DEFAULT_HOST = "127.0.0.1"
@@ -18,6 +19,12 @@ INACTIVITY_CHECK_INTERVAL = 5  # seconds
 # Background workers
 DOWNLOAD_WORKER_COUNT = 3
 
+# Resource governor (limits applied to downloads while a match is running)
+IN_GAME_DOWNLOAD_CONCURRENCY = 1  # parallel downloads allowed in game
+IN_GAME_DOWNLOAD_RATE_LIMIT = "1M"  # yt-dlp --limit-rate value (bytes/s)
+IN_GAME_FFMPEG_THREADS = 1  # ffmpeg encoder threads in game (0 = auto)
+IN_GAME_NICE_LEVEL = 10  # POSIX niceness for download subprocesses in game
+
 # Game monitoring'
 GAME_MONITOR_POLL_INTERVAL = 60  # seconds between game state checks
 GAME_MONITOR_RETRY_INTERVAL = 20  # seconds between retries when no game active
@@ -32,6 +39,114 @@ LOG_LEVEL = "info"
 ACCESS_LOG_ENABLED = True
 TRACK_COUNT = 50
 
+# Just-in-time download scheduling
+PLAYBACK_BUFFER_TARGET = 15 * 60  # seconds of ready playtime to keep ahead
+ESTIMATED_TRACK_DURATION = 210  # seconds assumed for tracks of unknown length
+
+# Audio output profile: "mp3" transcodes every download to 192K MP3,
+# "native" keeps the source container (M4A/AAC or Opus) without re-encoding
+AUDIO_OUTPUT_PROFILE = "mp3"
+NATIVE_AUDIO_FORMAT = "bestaudio[ext=m4a]/bestaudio"  # M4A plays on all clients
+NORMALIZE_PASSTHROUGH_AUDIO = False  # loudnorm would force a re-encode
+
+# Per-champion playlist sessions kept for instant switch-back
+SESSION_MAX_COUNT = 5  # sessions held, including the active one
+SESSION_DISK_BUDGET_MB = 1024  # downloaded audio kept across all sessions
+
+# Fast start: first tracks of each playlist use a small format, no loudnorm,
+# and are upgraded to full quality in the background
+FAST_START_ENABLED = True
+FAST_START_TRACK_COUNT = 2
+FAST_START_FORMAT = "bestaudio[abr<=80]/worstaudio/bestaudio"
+FAST_START_AUDIO_QUALITY = "96K"
+
+# Progressive streaming: publish tracks while FFmpeg is still encoding them
+STREAMING_ENABLED = False
+STREAMING_PUBLISH_BYTES = 64 * 1024  # encoded bytes required before publishing
+STREAMING_PUBLISH_TIMEOUT = 30  # seconds to wait for the first audio
+STREAMING_CHUNK_SIZE = 64 * 1024
+STREAMING_POLL_INTERVAL = 0.2  # seconds between reads of a growing file
+
+# Queue persistence: playlists and pending downloads are journaled to disk so
+# a restarted backend resumes where it stopped, reusing the cached files
+QUEUE_PERSISTENCE_ENABLED = True
+STATE_DIR = Path(tempfile.gettempdir()) / "LeagueMusicPlayer"
+JOURNAL_COMPACT_EVENTS = 500  # journal entries before writing a new snapshot
+
+# Lookahead: upcoming tracks listed for the client and warmed into page cache
+UPCOMING_DEFAULT_COUNT = 3
+UPCOMING_MAX_COUNT = 20
+PREFETCH_TRACK_COUNT = 1  # upcoming tracks warmed when a track starts
+PREFETCH_CHUNK_SIZE = 1024 * 1024  # read-ahead block size where fadvise is missing
+
+# Waveform peaks computed after each download for seek bar rendering
+WAVEFORM_ENABLED = True
+WAVEFORM_PEAK_COUNT = 1000  # min/max pairs per track
+WAVEFORM_SAMPLE_RATE = 8000  # Hz of the mono PCM the peaks are computed from
+
+# Lower-bitrate renditions for slow links, transcoded to AAC on first request
+RENDITIONS_ENABLED = True
+RENDITION_BITRATES = {"low": "64k", "medium": "96k"}  # quality name -> bitrate
+SAVE_DATA_QUALITY = "low"  # picked for clients sending "Save-Data: on"
+
+# Recommendation cache: generated playlists reused per (champion, model, prompts)
+RECOMMENDATION_CACHE_ENABLED = True
+RECOMMENDATION_CACHE_TTL = 7 * 24 * 3600  # seconds before a playlist is regenerated
+RECOMMENDATION_CACHE_PARTIAL_TTL = 3600  # for playlists short of their target
+RECOMMENDATION_CACHE_MAX_ENTRIES = 100  # least recently used evicted beyond this
+RECOMMENDATION_REFRESH_AFTER_USES = 3  # hits before part of a playlist is renewed
+RECOMMENDATION_REFRESH_FRACTION = 0.3  # share of tracks regenerated on refresh
+NEIGHBOUR_SIMILARITY_THRESHOLD = 0.8  # cosine similarity to borrow a playlist
+NEIGHBOUR_BLEND_TRACKS = 10  # tracks borrowed from a similar champion's cache
+
+# Idle pre-generation: between games, prepare playlists for the most played
+# champions so picking one resumes a warm session
+PREGENERATION_ENABLED = True
+PREGENERATION_TOP_K = 3  # most played champions kept prepared
+PREGENERATION_TRACKS = 2  # tracks downloaded per prepared champion
+PREGENERATION_INTERVAL = 60  # seconds between idle checks
+PREGENERATION_DAILY_LLM_LIMIT = 6  # uncached playlists generated per day
+PREGENERATION_MIN_FREE_DISK_MB = 2048  # skipped when the cache disk is fuller
+
+# LLM rate limits per model (requests and tokens per minute); calls over the
+# limit wait their turn instead of failing, and 429s pause the whole model
+LLM_RATE_LIMIT_DEFAULT = {"rpm": 30, "tpm": 6000}
+LLM_RATE_LIMITS = {
+    "llama-3.3-70b-versatile": {"rpm": 30, "tpm": 12000},
+    "llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000},
+    "openai/gpt-oss-120b": {"rpm": 30, "tpm": 8000},
+    "fake": {"rpm": 6000, "tpm": 10_000_000},  # LLM_BACKEND = "fake"
+}
+LLM_OUTPUT_TOKENS_ESTIMATE = 1024  # reserved per call until real usage is known
+LLM_RATE_LIMIT_MAX_RETRIES = 5  # rate-limited attempts before giving up
+LLM_RATE_LIMIT_BACKOFF = 2.0  # seconds, doubled per attempt without retry-after
+LLM_MAX_CONCURRENCY = 5  # per-theme playlist requests issued at once
+
+# LLM backend: "groq" (real API), "fake" (offline stand-in with simulated
+# latency and failures), "record" (groq, saving responses to the cassette) or
+# "replay" (responses from the cassette, no network)
+LLM_BACKEND = "groq"
+LLM_CASSETTE_PATH = STATE_DIR / "llm_cassette.jsonl"
+LLM_REPLAY_LATENCY = True  # replay waits as long as the recorded call took
+FAKE_LLM_LATENCY = 1.5  # seconds per call
+FAKE_LLM_JITTER = 0.5  # +/- seconds added uniformly at random
+FAKE_LLM_FAILURE_RATE = 0.0  # share of calls failing with a generic error
+FAKE_LLM_RATE_LIMIT_RATE = 0.0  # share of calls failing with a 429
+FAKE_LLM_LIST_LENGTH = 5  # items in every list of a fake response
+
+# Offline recommender over the bundled catalog.json: plays the first tracks
+# while the LLM works and the whole playlist when the LLM is unavailable
+LOCAL_RECOMMENDER_ENABLED = True
+LOCAL_FIRST_TRACKS = 2  # catalog tracks scheduled before the LLM answers
+LOCAL_PALETTE_WEIGHT = 2.0  # palette influence relative to one tag's weights
+
+# Playlist prompt mode per model: "two_stage" asks for themes, then tracks per
+# theme (in parallel, streamed per theme); "single" asks for themes and tracks
+# in one structured-output call. A model should only opt in to "single" here
+# once benchmarks/bench_prompt_modes.py shows a win for it
+PLAYLIST_PROMPT_MODE_DEFAULT = "two_stage"
+PLAYLIST_PROMPT_MODES = {}  # model name -> mode
+
 
 BASE_DIR = ""
 if getattr(sys, "frozen", False):
@@ -1,7 +1,7 @@
 """Core package initialization."""
 
 from .lifecycle import lifespan, shutdown_services, startup_services
-from .middleware import track_activity_middleware
+from .middleware import ActivityMiddleware
 from .monitoring import get_idle_time, shutdown_monitor, update_activity
 from .server import get_available_port, run_server, save_port_to_file
 
@@ -15,7 +15,7 @@ __all__ = [
     "get_idle_time",
     "shutdown_monitor",
     # Middleware
-    "track_activity_middleware",
+    "ActivityMiddleware",
     # Server
     "get_available_port",
     "save_port_to_file",
@@ -0,0 +1,222 @@
+"""
+File transfer over raw ASGI.
+Serves whole files and byte ranges with zero-copy send when the server supports it.
+"""
+
+import os
+import secrets
+from typing import Awaitable, Callable, Dict, List, MutableMapping, Optional, Tuple
+
+import anyio.to_thread
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+READ_CHUNK_SIZE = 256 * 1024
+MAX_RANGES = 16  # more ranges than this are served as the full file
+
+Send = Callable[[MutableMapping], Awaitable[None]]
+ByteRange = Tuple[int, int]  # inclusive start, inclusive end
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when none of the requested ranges overlap the file."""
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against a quoted ETag.
+
+    Args:
+        if_none_match: Header value (comma-separated tags, W/ allowed, or *)
+        etag: Quoted ETag of the current representation
+
+    Returns:
+        True if the client already holds this representation
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[List[ByteRange]]:
+    """
+    Parse a Range header into byte ranges.
+
+    Overlapping or adjacent ranges are merged. Unparseable headers and
+    requests for too many ranges are ignored, as allowed by RFC 9110.
+
+    Args:
+        header: Range header value
+        size: File size in bytes
+
+    Returns:
+        Sorted, merged inclusive ranges, or None to serve the full file
+
+    Raises:
+        RangeNotSatisfiable: If no range overlaps the file
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+
+    ranges: List[ByteRange] = []
+    for spec in header[len("bytes=") :].split(","):
+        start_text, sep, end_text = spec.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if start_text:
+                start = int(start_text)
+                end = int(end_text) if end_text else size - 1
+            else:
+                start, end = max(0, size - int(end_text)), size - 1
+        except ValueError:
+            return None
+
+        if start > end and end_text and start_text:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _read_at(fd: int, offset: int, count: int) -> bytes:
+    """Read count bytes at offset without sharing a file position."""
+    if hasattr(os, "pread"):
+        return os.pread(fd, count, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, count)
+
+
+async def _send_region(
+    send: Send, fd: int, offset: int, count: int, zerocopy: bool
+) -> None:
+    """Send count bytes of a file starting at offset (more body follows)."""
+    if zerocopy:
+        await send(
+            {
+                "type": ZEROCOPY_EXTENSION,
+                "file": fd,
+                "offset": offset,
+                "count": count,
+                "more_body": True,
+            }
+        )
+        return
+
+    end = offset + count
+    while offset < end:
+        chunk = await anyio.to_thread.run_sync(
+            _read_at, fd, offset, min(READ_CHUNK_SIZE, end - offset)
+        )
+        if not chunk:
+            break
+        offset += len(chunk)
+        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+
+async def send_file(
+    scope: MutableMapping,
+    send: Send,
+    path: str,
+    size: int,
+    media_type: str,
+    headers: Dict[str, str],
+    ranges: Optional[List[ByteRange]] = None,
+) -> None:
+    """
+    Send a file, or byte ranges of it, as the HTTP response.
+
+    Uses the zero-copy send extension (os.sendfile in the server) when the
+    ASGI server advertises it, otherwise reads with pread in a worker
+    thread. A single range is a plain 206; several ranges are sent as
+    multipart/byteranges.
+
+    Args:
+        scope: ASGI connection scope
+        send: ASGI send callable
+        path: File to send
+        size: File size in bytes
+        media_type: Content type of the file
+        headers: Extra response headers
+        ranges: Inclusive byte ranges, or None for the whole file
+    """
+    zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+    head = scope["method"] == "HEAD"
+    response_headers = {**headers, "accept-ranges": "bytes"}
+
+    if not ranges:
+        status = 200
+        response_headers["content-type"] = media_type
+        response_headers["content-length"] = str(size)
+        parts = [(b"", 0, size)]
+        trailer = b""
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        status = 206
+        response_headers["content-type"] = media_type
+        response_headers["content-range"] = f"bytes {start}-{end}/{size}"
+        response_headers["content-length"] = str(end - start + 1)
+        parts = [(b"", start, end - start + 1)]
+        trailer = b""
+    else:
+        status = 206
+        boundary = secrets.token_hex(12)
+        response_headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        parts = [
+            (
+                (
+                    f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                ).encode("latin-1"),
+                start,
+                end - start + 1,
+            )
+            for start, end in ranges
+        ]
+        # Each part after the first starts with the CRLF ending the previous one
+        parts = [parts[0]] + [(b"\r\n" + p, o, c) for p, o, c in parts[1:]]
+        trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        response_headers["content-length"] = str(
+            sum(len(p) + c for p, _, c in parts) + len(trailer)
+        )
+
+    # Open before starting the response so a vanished file is still a clean error
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (key.lower().encode("latin-1"), value.encode("latin-1"))
+                    for key, value in response_headers.items()
+                ],
+            }
+        )
+        if head:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        for preamble, offset, count in parts:
+            if preamble:
+                await send(
+                    {"type": "http.response.body", "body": preamble, "more_body": True}
+                )
+            await _send_region(send, fd, offset, count, zerocopy)
+        await send({"type": "http.response.body", "body": trailer})
+    finally:
+        os.close(fd)
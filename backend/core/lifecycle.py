@@ -5,6 +5,7 @@ Handles startup and shutdown of background services.
 
 import asyncio
 import threading
+import time
 from contextlib import asynccontextmanager
 from typing import Callable
 
@@ -15,9 +16,14 @@ from config import (
     DOWNLOAD_WORKER_COUNT,
     GAME_MONITOR_POLL_INTERVAL,
     GAME_MONITOR_RETRY_INTERVAL,
+    QUEUE_PERSISTENCE_ENABLED,
 )
 from core.monitoring import shutdown_monitor
 from music.download import MusicDownloader
+from music.journal import QueueJournal
+from music.pregeneration import PlaylistPregenerator
+from music.queue import PlaybackQueue
+from music.scheduler import DownloadScheduler
 from game import GameMonitorService
 
 
@@ -38,6 +44,38 @@ def start_background_thread(target: Callable, name: str = None) -> threading.Thr
     return thread
 
 
+def restore_queue_state() -> None:
+    """
+    Restore playlists from the queue journal and start journaling.
+
+    Tracks are rebound to the files still in the cache, unreferenced
+    cache files are removed, and pending downloads are rescheduled once
+    the download workers are running.
+    """
+    start = time.perf_counter()
+    journal = QueueJournal()
+    queue = PlaybackQueue()
+    scheduler = DownloadScheduler()
+
+    state = journal.load()
+    available = queue.restore(state)
+    scheduler.restore(state["pending"])
+    MusicDownloader().prune_cache(
+        track["path"]
+        for session in state["sessions"].values()
+        for track in session["tracks"]
+    )
+
+    queue.attach_journal(journal)
+    scheduler.attach_journal(journal)
+    journal.start(scheduler.checkpoint)
+
+    logger.info(
+        f"Restored {len(state['sessions'])} playlist sessions "
+        f"({available} cached tracks) in {(time.perf_counter() - start) * 1000:.1f}ms"
+    )
+
+
 def startup_services() -> None:
     """
     Start all background services required by the application.
@@ -46,9 +84,14 @@ def startup_services() -> None:
         - Game state monitoring
         - Inactivity shutdown monitor
         - Music download workers
+        - Queue journal (when persistence is enabled)
+        - Idle playlist pre-generation
     """
     logger.info("Starting background services...")
 
+    if QUEUE_PERSISTENCE_ENABLED:
+        restore_queue_state()
+
     # Start game monitoring
     monitor = GameMonitorService(
         poll_interval=GAME_MONITOR_POLL_INTERVAL,
@@ -67,6 +110,13 @@ def startup_services() -> None:
             target=MusicDownloader().download_worker, name=f"DownloadWorker-{i+1}"
         )
 
+    # Resume downloads left pending by the previous run
+    if QUEUE_PERSISTENCE_ENABLED:
+        DownloadScheduler().refill()
+
+    # Prepare playlists for favourite champions between games
+    start_background_thread(target=PlaylistPregenerator().run, name="Pregenerator")
+
     logger.info(
         f"All background services started successfully ({DOWNLOAD_WORKER_COUNT} download workers)"
     )
@@ -77,11 +127,15 @@ def shutdown_services() -> None:
     Gracefully shutdown all background services and cleanup resources.
 
     Cleanup tasks:
-        - Remove temporary cache directory
+        - Stop playlist pre-generation
         - Stop all download worker threads
+        - Flush the queue journal, or remove the temporary cache directory
+          when persistence is disabled
     """
     logger.info("Shutting down background services...")
 
+    PlaylistPregenerator().stop()
+
     # Get downloader instance and cleanup
     downloader = MusicDownloader()
 
@@ -89,8 +143,11 @@ def shutdown_services() -> None:
     for _ in range(DOWNLOAD_WORKER_COUNT):
         downloader.download_queue.put(None)
 
-    # Clean up cache directory
-    downloader.cleanup()
+    if QUEUE_PERSISTENCE_ENABLED:
+        # Keep the cache for the next run
+        QueueJournal().stop()
+    else:
+        downloader.cleanup()
 
     logger.info("Shutdown complete")
 
@@ -3,25 +3,25 @@ Application middleware components.
 Contains custom middleware for request processing.
 """
 
-from fastapi import Request, Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from core.monitoring import update_activity
 
 
-async def track_activity_middleware(request: Request, call_next) -> Response:
+class ActivityMiddleware:
     """
-    Middleware to track request activity for idle shutdown monitoring.
+    Raw ASGI middleware to track request activity for idle shutdown monitoring.
 
-    Updates the last request timestamp on every incoming request to prevent
-    premature shutdown during active use.
+    Updates the last request timestamp when a request arrives, preventing
+    premature shutdown during active use. Requests and responses (including
+    streamed audio) are passed through untouched, without the per-request
+    task and body wrapping of http-decorator middleware.
+    """
 
-    Args:
-        request: The incoming request
-        call_next: The next middleware/handler in the chain
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-    Returns:
-        The response from the request handler
-    """
-    update_activity()
-    response = await call_next(request)
-    return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket"):
+            update_activity()
+        await self.app(scope, receive, send)
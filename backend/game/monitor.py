@@ -9,7 +9,9 @@ from typing import Optional
 from loguru import logger
 
 from game.game_state import GameStateManager
+from music.governor import ResourceGovernor
 from music.playlist import PlaylistGenerator
+from music.pregeneration import PlaylistPregenerator
 from schemas import Champion
 from config.settings import TRACK_COUNT
 
@@ -34,8 +36,11 @@ class GameMonitorService:
         self.retry_interval = retry_interval
         self.last_champion: Optional[Champion] = None
         self._running = False
+        self._game_counted = False
         self.game_state = GameStateManager()
         self.playlist_generator = PlaylistGenerator()
+        self.governor = ResourceGovernor()
+        self.pregenerator = PlaylistPregenerator()
 
     def start(self) -> None:
         """
@@ -68,10 +73,15 @@ class GameMonitorService:
         Check current game state and update if champion changed.
 
         Polls the Riot client, waits for an active game, and triggers
-        playlist generation if a new champion is detected.
+        playlist generation if a new champion is detected. Each game is
+        counted once for pre-generation, even with the same champion.
         """
         current_champion = self._get_active_champion()
 
+        if not self._game_counted:
+            self._game_counted = True
+            self.pregenerator.record_play(current_champion)
+
         if self._champion_changed(current_champion):
             logger.info(f"Champion changed: {current_champion.name}")
             self.last_champion = current_champion
@@ -82,6 +92,7 @@ class GameMonitorService:
         Get the currently active champion from Riot client.
 
         Polls repeatedly until a game is active and champion data is available.
+        Keeps the resource governor informed of whether a match is running.
 
         Returns:
             The active champion data
@@ -92,12 +103,15 @@ class GameMonitorService:
             logger.info(
                 "No active game detected. Waiting for player to enter a match..."
             )
+            self.governor.set_in_game(False)
+            self._game_counted = False
 
         # Wait until player is in an active game
         while not champion:
             sleep(self.retry_interval)
             champion = self.game_state.get_current_champion()
 
+        self.governor.set_in_game(True)
         return champion
 
     def _champion_changed(self, current_champion: Champion) -> bool:
@@ -3,21 +3,59 @@ Music package - Music recommendation, download, and playback system.
 
 This package provides:
 - Style inference from game state (champion/region styles)
-- Music recommendations based on styles
+- Music recommendations based on styles, with an offline catalog fallback
 - Playlist generation
 - Music downloads from YouTube
 - Playback queue management
+- Game-aware resource budget for downloads
+- Just-in-time download scheduling
+- Audio output profiles (MP3 or native passthrough)
+- Crash-safe queue journal for resuming after a restart
+- Page cache prefetching of upcoming tracks
+- Waveform peaks and lower-bitrate renditions
+- Persistent cache of generated playlists per champion, shared with
+  similar champions
+- Idle pre-generation of playlists for the most played champions
+- Shared LLM client and prompt templates behind a rate limiter
+- Fake and record/replay LLM backends for offline benchmarks
 """
 
-from .download import MusicDownloader
+from .champion_index import ChampionIndex
+from .download import DownloadRequest, MusicDownloader
+from .governor import ResourceGovernor
+from .journal import QueueJournal
+from .llm_backends import FakeStructuredModel, LLMCassette
+from .llm_provider import LLMProvider
+from .local_recommender import LocalRecommender
 from .playlist import PlaylistGenerator
-from .queue import PlaybackQueue
+from .prefetch import TrackPrefetcher
+from .pregeneration import PlaylistPregenerator
+from .rate_limiter import RateLimiter
+from .queue import PlaybackQueue, Track
+from .recommendation_cache import RecommendationCache
+from .renditions import RenditionCache
 from .recommendations import RecommendationEngine
+from .scheduler import DownloadScheduler
 
 __all__ = [
     # Main classes
     "RecommendationEngine",
     "PlaylistGenerator",
     "MusicDownloader",
+    "DownloadRequest",
     "PlaybackQueue",
+    "Track",
+    "ResourceGovernor",
+    "DownloadScheduler",
+    "QueueJournal",
+    "TrackPrefetcher",
+    "RenditionCache",
+    "RecommendationCache",
+    "LLMProvider",
+    "FakeStructuredModel",
+    "LLMCassette",
+    "RateLimiter",
+    "LocalRecommender",
+    "ChampionIndex",
+    "PlaylistPregenerator",
 ]
@@ -0,0 +1,185 @@
+"""
+Champion index - Similarity between champions from Data Dragon metadata.
+Lets a champion without a cached playlist borrow tracks from a close neighbour.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from config.settings import STATE_DIR
+from music.local_recommender import palette_features
+from schemas import Champion
+
+INDEX_FILE_NAME = "champion_index.json"
+CHAMPION_TAGS = ("Assassin", "Fighter", "Mage", "Marksman", "Support", "Tank")
+TITLE_DIMENSIONS = 32
+MIN_KEYWORD_LENGTH = 4  # skips articles and prepositions ("o", "da", "of")
+
+# Relative weight of each part of the feature vector
+TAG_WEIGHT = 1.0
+TITLE_WEIGHT = 0.5
+PALETTE_WEIGHT = 0.8
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    """Scale a vector to unit length (zero vectors stay zero)."""
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def title_vector(title: str) -> np.ndarray:
+    """
+    Hash the keywords of a champion title into a fixed-size vector.
+
+    Args:
+        title: Champion title (e.g. "the Unforgiven")
+
+    Returns:
+        Keyword counts over TITLE_DIMENSIONS buckets
+    """
+    vector = np.zeros(TITLE_DIMENSIONS, dtype=np.float32)
+    for word in re.findall(r"\w+", title.lower()):
+        if len(word) >= MIN_KEYWORD_LENGTH:
+            digest = hashlib.blake2b(word.encode(), digest_size=4).digest()
+            vector[int.from_bytes(digest, "little") % TITLE_DIMENSIONS] += 1
+    return vector
+
+
+def champion_profile(champion: Champion) -> Dict[str, object]:
+    """Get the metadata of a champion the index compares."""
+    return {
+        "tags": list(champion.tags),
+        "title": champion.title,
+        "palette": list(champion.palette),
+    }
+
+
+def champion_vector(profile: Dict[str, object]) -> np.ndarray:
+    """
+    Build the unit feature vector of a champion profile.
+
+    Args:
+        profile: Dict with "tags", "title" and "palette"
+
+    Returns:
+        Concatenated tag, title keyword and palette features
+    """
+    tags = np.array([t in profile["tags"] for t in CHAMPION_TAGS], dtype=np.float32)
+    parts = [
+        TAG_WEIGHT * _unit(tags),
+        TITLE_WEIGHT * _unit(title_vector(profile["title"])),
+        PALETTE_WEIGHT * _unit(palette_features(profile["palette"])),
+    ]
+    return _unit(np.concatenate(parts).astype(np.float32))
+
+
+class ChampionIndex:
+    """
+    Persistent similarity index over the champions seen so far.
+
+    Each champion is stored as a small profile (tags, title and palette,
+    as fetched from Data Dragon) and turned into a unit feature vector, so
+    cosine similarity against every known champion is one matrix product.
+    Only champions that have been played are indexed, which are exactly
+    the ones that can have cached playlists.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ChampionIndex, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the index and load it from disk."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self.path = Path(STATE_DIR) / INDEX_FILE_NAME
+        self._profiles: Dict[str, Dict[str, object]] = {}
+        self._names: List[str] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+        self._load()
+
+    def add(self, champion: Champion) -> None:
+        """
+        Index a champion (or update its profile).
+
+        Args:
+            champion: Champion with Data Dragon metadata
+        """
+        profile = champion_profile(champion)
+        with self._lock:
+            if self._profiles.get(champion.name) == profile:
+                return
+            self._profiles[champion.name] = profile
+            self._rebuild()
+            self._save()
+
+    def nearest(
+        self, champion: Champion, candidates: Iterable[str]
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Find the most similar indexed champion among candidates.
+
+        Args:
+            champion: Champion to compare
+            candidates: Names of champions eligible as neighbours
+
+        Returns:
+            (name, cosine similarity) of the best candidate, or None
+        """
+        vector = champion_vector(champion_profile(champion))
+        allowed = set(candidates) - {champion.name}
+
+        with self._lock:
+            rows = [i for i, name in enumerate(self._names) if name in allowed]
+            if not rows:
+                return None
+            scores = self._matrix[rows] @ vector
+            best = int(np.argmax(scores))
+            return self._names[rows[best]], float(scores[best])
+
+    def _rebuild(self) -> None:
+        """Recompute the feature matrix (lock must be held)."""
+        self._names = list(self._profiles)
+        self._matrix = np.array(
+            [champion_vector(p) for p in self._profiles.values()], dtype=np.float32
+        )
+
+    def _load(self) -> None:
+        """Load profiles from disk, ignoring a missing or corrupt file."""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._profiles = json.load(f)
+            self._rebuild()
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable champion index: {e}")
+            self._profiles = {}
+            self._rebuild()
+
+    def _save(self) -> None:
+        """Write profiles to disk atomically (lock must be held)."""
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._profiles, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Error saving champion index: {e}")
@@ -1,12 +1,12 @@
-import time
-import json
-import os
-from typing import List
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
+from typing import Iterator, List
 from pydantic import BaseModel, Field
 from loguru import logger
-from config.settings import BASE_DIR
+from config.settings import (
+    LLM_MAX_CONCURRENCY,
+    PLAYLIST_PROMPT_MODE_DEFAULT,
+    PLAYLIST_PROMPT_MODES,
+)
+from music.llm_provider import LLMProvider
 import random
 
 # --- Modelos de Dados ---
@@ -33,34 +33,56 @@ class ListaMusicas(BaseModel):
     musicas: List[Musica]
 
 
+class TemaComMusicas(TemaMusical):
+    musicas: List[Musica]
+
+
+class PlaylistCompleta(BaseModel):
+    temas: List[TemaComMusicas]
+
+
 # --- Configuração ---
 
 
+MODO_ETAPAS = "two_stage"
+MODO_UNICO = "single"
+TEMAS_POR_CAMPEAO = 5  # quantidade de estéticas pedida pelos prompts
+
+
+def carregar_config() -> dict:
+    """Config.json com chave de API e modelo (relido só quando o arquivo muda)"""
+    return LLMProvider().get_config()
+
+
+def get_model_name() -> str:
+    """Nome do modelo configurado"""
+    return LLMProvider().get_model_name()
+
+
+def get_prompt_mode(model: str = None) -> str:
+    """Modo de geração (MODO_ETAPAS ou MODO_UNICO) usado para o modelo"""
+    model = model or get_model_name()
+    return PLAYLIST_PROMPT_MODES.get(model, PLAYLIST_PROMPT_MODE_DEFAULT)
+
+
 def get_llm():
-    config_path = BASE_DIR / "config.json"
-    with open(config_path, "r") as f:
-        config = json.load(f)
-    if config.get("api_key"):
-        os.environ["GROQ_API_KEY"] = config["api_key"]
-    model = config.get("model", "llama-3.3-70b-versatile")
-    return ChatGroq(model=model, temperature=0.7)
+    """Cliente do LLM compartilhado, recriado só quando modelo ou chave mudam"""
+    return LLMProvider().get_llm()
+
 
+def get_prompt_version() -> str:
+    """Hash curto do arquivo de prompts, muda sempre que um prompt é editado"""
+    return LLMProvider().get_prompt_version()
 
-def carregar_prompt(nome_chave: str, arquivo="prompts.json"):
-    """Lê o prompt do JSON e converte para ChatPromptTemplate"""
-    arquivo = os.path.join(BASE_DIR, arquivo)
-    if not os.path.exists(arquivo):
-        raise FileNotFoundError(f"Arquivo {arquivo} não encontrado.")
 
-    with open(arquivo, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def carregar_prompt(nome_chave: str):
+    """ChatPromptTemplate do prompts.json (compilado uma vez por versão do arquivo)"""
+    return LLMProvider().get_prompt(nome_chave)
 
-    if nome_chave not in data:
-        raise KeyError(f"Chave '{nome_chave}' não encontrada no JSON.")
 
-    # Converte lista de dicts para lista de tuplas [(role, content), ...]
-    mensagens = [(msg["role"], msg["content"]) for msg in data[nome_chave]]
-    return ChatPromptTemplate.from_messages(mensagens)
+def carregar_chain(nome_chave: str, schema: type):
+    """Prompt ligado ao LLM com saída estruturada, reaproveitado entre chamadas"""
+    return LLMProvider().get_chain(nome_chave, schema)
 
 
 # --- Funções do Agente ---
@@ -70,9 +92,7 @@ def gerar_temas(campeao: str) -> List[TemaMusical]:
     """Estágio 1: Define a estratégia da playlist"""
     logger.info(f"🧠 Analisando a personalidade de {campeao}...")
 
-    llm = get_llm()
-    prompt = carregar_prompt("analise_campeao")
-    chain = prompt | llm.with_structured_output(ListaTemas)
+    chain = carregar_chain("analise_campeao", ListaTemas)
     resultado = chain.invoke({"campeao": campeao})
     return resultado.temas
 
@@ -81,9 +101,7 @@ def gerar_musicas_por_tema(campeao: str, tema: TemaMusical, qtd: int) -> List[st
     """Estágio 2: Preenche a playlist baseada no tema"""
     logger.info(f"Gerando {qtd} faixas do estilo: {tema.estilo} - {tema.descricao}...")
 
-    llm = get_llm()
-    prompt = carregar_prompt("gerador_playlist")
-    chain = prompt | llm.with_structured_output(ListaMusicas)
+    chain = carregar_chain("gerador_playlist", ListaMusicas)
 
     try:
         resultado = chain.invoke(
@@ -100,25 +118,75 @@ def gerar_musicas_por_tema(campeao: str, tema: TemaMusical, qtd: int) -> List[st
         return []
 
 
-# --- Fluxo Principal ---
+def _entradas_por_tema(campeao: str, temas: List[TemaMusical], qtd: int) -> List[dict]:
+    """Variáveis do prompt do estágio 2, uma por tema"""
+    return [
+        {
+            "campeao": campeao,
+            "estilo": tema.estilo,
+            "descricao": tema.descricao,
+            "qtd": qtd,
+        }
+        for tema in temas
+    ]
+
+
+def gerar_musicas_em_paralelo(
+    campeao: str, temas: List[TemaMusical], qtd: int
+) -> List[List[str]]:
+    """Estágio 2 em paralelo: uma chamada por tema, até LLM_MAX_CONCURRENCY por vez"""
+    logger.info(f"Gerando {qtd} faixas para {len(temas)} temas em paralelo...")
+
+    chain = carregar_chain("gerador_playlist", ListaMusicas)
+    entradas = _entradas_por_tema(campeao, temas, qtd)
+    resultados = chain.batch(
+        entradas,
+        config={"max_concurrency": LLM_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
 
+    # Temas que falharam viram listas vazias, o resto da playlist é mantido
+    listas = []
+    for tema, resultado in zip(temas, resultados):
+        if isinstance(resultado, Exception):
+            logger.info(f"Erro ao gerar para {tema.estilo}: {resultado}")
+            listas.append([])
+        else:
+            listas.append([m.search_query for m in resultado.musicas])
+    return listas
 
-def gerar_playlist(campeao: str, total_alvo: int = 100):
-    try:
-        playlist_final = []
 
-        # 1. Pega 5 temas (Ex: Yasuo -> Hip Hop, Flauta Japonesa, Epic Rock, etc)
-        temas = gerar_temas(campeao)
-        for t in temas:
-            logger.info(f"Tema gerado: {t.estilo} - {t.descricao}")
-        musicas_por_tema = total_alvo // len(temas)
+def gerar_playlist_unica(campeao: str, qtd: int) -> List[str]:
+    """Estágios 1 e 2 numa única chamada: temas e faixas de cada tema"""
+    logger.info(f"🧠 Gerando temas e faixas de {campeao} numa única chamada...")
 
-        for tema in temas:
-            queries = gerar_musicas_por_tema(campeao, tema, musicas_por_tema)
-            for q in queries:
-                logger.info(f"  -> {q}")
-            playlist_final.extend(queries)
-            time.sleep(1)
+    chain = carregar_chain("playlist_unica", PlaylistCompleta)
+    resultado = chain.invoke({"campeao": campeao, "qtd": qtd})
+
+    queries = []
+    for tema in resultado.temas:
+        logger.info(f"Tema gerado: {tema.estilo} - {tema.descricao}")
+        queries.extend(m.search_query for m in tema.musicas[:qtd])
+    return queries
+
+
+# --- Fluxo Principal ---
+
+
+def gerar_playlist(
+    campeao: str, total_alvo: int = 100, paralelo: bool = True, modo: str = None
+):
+    """Gera a playlist completa; paralelo só se aplica ao modo em etapas"""
+    modo = modo or get_prompt_mode()
+    if modo == MODO_UNICO and not paralelo:
+        raise ValueError("Geração sequencial só existe no modo em etapas")
+
+    try:
+        if modo == MODO_UNICO:
+            qtd = max(1, total_alvo // TEMAS_POR_CAMPEAO)
+            playlist_final = gerar_playlist_unica(campeao, qtd)
+        else:
+            playlist_final = _gerar_playlist_em_etapas(campeao, total_alvo, paralelo)
     except Exception as e:
         logger.error(f"Erro ao gerar playlist para {campeao}: {e}")
         playlist_final = []
@@ -127,3 +195,67 @@ def gerar_playlist(campeao: str, total_alvo: int = 100):
     for query in playlist_final:
         logger.info(f"{query}")
     return playlist_final
+
+
+def _gerar_playlist_em_etapas(
+    campeao: str, total_alvo: int, paralelo: bool
+) -> List[str]:
+    """Estágio 1 e depois estágio 2 para cada tema"""
+    playlist_final = []
+
+    # 1. Pega 5 temas (Ex: Yasuo -> Hip Hop, Flauta Japonesa, Epic Rock, etc)
+    temas = gerar_temas(campeao)
+    for t in temas:
+        logger.info(f"Tema gerado: {t.estilo} - {t.descricao}")
+    # Pelo menos uma faixa por tema, mesmo para alvos pequenos
+    musicas_por_tema = max(1, total_alvo // len(temas))
+
+    # 2. Preenche cada tema
+    if paralelo:
+        listas = gerar_musicas_em_paralelo(campeao, temas, musicas_por_tema)
+    else:
+        listas = []
+        for tema in temas:
+            listas.append(gerar_musicas_por_tema(campeao, tema, musicas_por_tema))
+
+    for queries in listas:
+        for q in queries:
+            logger.info(f"  -> {q}")
+        playlist_final.extend(queries)
+    return playlist_final
+
+
+def gerar_playlist_em_partes(
+    campeao: str, total_alvo: int = 100, modo: str = None
+) -> Iterator[List[str]]:
+    """Gera a playlist entregando as faixas de cada tema assim que ficam prontas"""
+    if (modo or get_prompt_mode()) == MODO_UNICO:
+        # Uma chamada só: todos os temas chegam juntos
+        qtd = max(1, total_alvo // TEMAS_POR_CAMPEAO)
+        playlist = gerar_playlist_unica(campeao, qtd)
+        random.shuffle(playlist)
+        yield playlist
+        return
+
+    temas = gerar_temas(campeao)
+    for t in temas:
+        logger.info(f"Tema gerado: {t.estilo} - {t.descricao}")
+    musicas_por_tema = max(1, total_alvo // len(temas))
+
+    chain = carregar_chain("gerador_playlist", ListaMusicas)
+    entradas = _entradas_por_tema(campeao, temas, musicas_por_tema)
+    concluidos = chain.batch_as_completed(
+        entradas,
+        config={"max_concurrency": LLM_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
+    for indice, resultado in concluidos:
+        if isinstance(resultado, Exception):
+            logger.info(f"Erro ao gerar para {temas[indice].estilo}: {resultado}")
+            continue
+
+        queries = [m.search_query for m in resultado.musicas]
+        random.shuffle(queries)
+        for q in queries:
+            logger.info(f"  -> {q}")
+        yield queries
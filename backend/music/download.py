@@ -7,20 +7,74 @@ import queue
 import re
 import subprocess
 import tempfile
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Iterable, List, Optional
 import json
 from loguru import logger
+import numpy as np
+from music.formats import (
+    file_etag,
+    get_derived_files,
+    get_download_format,
+    get_extract_args,
+    get_output_suffix,
+    is_passthrough,
+)
+from music.governor import ResourceGovernor
 from music.queue import PlaybackQueue
-from config.settings import BASE_DIR
+from music.streaming import GrowingFileRegistry
+from music.waveform import Waveform, compute_peaks, load_waveform, save_waveform
+from config.settings import (
+    BASE_DIR,
+    FAST_START_AUDIO_QUALITY,
+    FAST_START_FORMAT,
+    NORMALIZE_PASSTHROUGH_AUDIO,
+    QUEUE_PERSISTENCE_ENABLED,
+    STATE_DIR,
+    STREAMING_ENABLED,
+    STREAMING_PUBLISH_BYTES,
+    STREAMING_PUBLISH_TIMEOUT,
+    WAVEFORM_ENABLED,
+    WAVEFORM_PEAK_COUNT,
+    WAVEFORM_SAMPLE_RATE,
+)
 
 # Constants
 FFMPEG_PATH = BASE_DIR / "ffmpeg" / "bin" / "ffmpeg.exe"
 YT_DLP_PATH = BASE_DIR / "yt-dlp.exe"
 CACHE_PREFIX = "playlist_"
+PERSISTENT_CACHE_DIR = STATE_DIR / "cache"
 
 # Shared queue for downloads
 _download_queue = queue.Queue()
 
+
+@dataclass
+class DownloadRequest:
+    """
+    A queued download.
+
+    Attributes:
+        query: Search query for the track
+        fast_start: Fetch a small format and skip normalization
+        source: Exact URL to download instead of searching for the query
+        replaces: Path of a fast-start file this download upgrades
+        session: Playlist session the track belongs to (None = active)
+    """
+
+    query: str
+    fast_start: bool = False
+    source: Optional[str] = None
+    replaces: Optional[str] = None
+    session: Optional[str] = None
+
+    @property
+    def is_upgrade(self) -> bool:
+        """Whether this download replaces an already published track."""
+        return self.replaces is not None
+
+
 try:
     logger.info("Checking for yt-dlp updates...")
     update_command = [str(YT_DLP_PATH), "-U"]
@@ -54,20 +108,85 @@ class MusicDownloader:
         self._initialized = True
         self.download_queue = _download_queue
         self.playback_queue = PlaybackQueue()
-        self.cache_dir = Path(tempfile.mkdtemp(prefix=CACHE_PREFIX))
+        self.governor = ResourceGovernor()
+        self.growing_files = GrowingFileRegistry()
+        self._done_callbacks: List[Callable[[DownloadRequest], None]] = []
+        if QUEUE_PERSISTENCE_ENABLED:
+            # Stable location so a restarted backend finds its files again
+            self.cache_dir = PERSISTENT_CACHE_DIR
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            self.cache_dir = Path(tempfile.mkdtemp(prefix=CACHE_PREFIX))
         self.ffmpeg_path = str(FFMPEG_PATH)
 
         logger.info(f"Music cache directory: {self.cache_dir}")
 
-    def queue_download(self, query: str) -> None:
+    def queue_download(
+        self, query: str, fast_start: bool = False, session: Optional[str] = None
+    ) -> None:
         """
         Queue a track for download.
 
         Args:
             query: Search query for the track
+            fast_start: Publish a low-bitrate version first and upgrade it
+                in the background
+            session: Playlist session to add the track to (None = active)
+        """
+        self.queue_request(
+            DownloadRequest(query, fast_start=fast_start, session=session)
+        )
+
+    def queue_request(self, request: DownloadRequest) -> None:
+        """
+        Queue a prepared download request.
+
+        Args:
+            request: The download to perform
+        """
+        self.download_queue.put(request)
+        logger.debug(f"Queued for download: {request.query}")
+
+    def clear_pending(self) -> List[DownloadRequest]:
+        """
+        Drop queued downloads that have not started yet.
+
+        Shutdown sentinels are kept in the queue.
+
+        Returns:
+            The downloads that were dropped, including fast-start upgrades,
+            in queue order
+        """
+        dropped = []
+        sentinels = 0
+
+        while True:
+            try:
+                request = self.download_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            self.download_queue.task_done()
+            if request is None:
+                sentinels += 1
+            else:
+                dropped.append(request)
+
+        for _ in range(sentinels):
+            self.download_queue.put(None)
+
+        if dropped:
+            logger.debug(f"Dropped {len(dropped)} pending downloads")
+        return dropped
+
+    def add_done_callback(self, callback: Callable[[DownloadRequest], None]) -> None:
+        """
+        Register a callback invoked after each download attempt finishes.
+
+        Args:
+            callback: Function receiving the request that was processed
         """
-        self.download_queue.put(query)
-        logger.debug(f"Queued for download: {query}")
+        self._done_callbacks.append(callback)
 
     def download_worker(self) -> None:
         """
@@ -80,39 +199,71 @@ class MusicDownloader:
 
         while True:
             try:
-                query = self.download_queue.get()
+                request = self.download_queue.get()
 
                 # None is sentinel for shutdown
-                if query is None:
+                if request is None:
                     logger.info("Download worker stopping")
                     break
 
-                # Download the track
-                self._download_track(query)
+                # Download the track within the current resource budget
+                with self.governor.download_slot():
+                    self._download_track(request)
 
                 # Mark task as done
                 self.download_queue.task_done()
+                self._notify_done(request)
 
             except Exception as e:
                 logger.error(f"Error in download worker: {e}", exc_info=True)
 
-    def _download_track(self, query: str) -> None:
+    def _notify_done(self, request: DownloadRequest) -> None:
+        """Invoke the registered done callbacks for a processed request."""
+        for callback in self._done_callbacks:
+            try:
+                callback(request)
+            except Exception as e:
+                logger.error(f"Error in download callback: {e}")
+
+    def _download_track(self, request: DownloadRequest) -> None:
         """
         Download a single track.
 
+        Fast-start requests fetch a smaller format, skip normalization and
+        queue a full-quality upgrade once published. Upgrade requests swap
+        the finished file in place of the fast-start version. Other requests
+        are streamed when STREAMING_ENABLED is set, except during a match,
+        where they go through yt-dlp and its rate limit. With the native
+        output profile the source codec is kept and no MP3 transcode happens.
+
         Args:
-            query: Search query for the track
+            request: The download to perform
         """
+        # FFmpeg reads streams itself, outside yt-dlp's in-game rate limit
+        streamable = not (request.fast_start or request.is_upgrade)
+        if STREAMING_ENABLED and streamable and not self.governor.in_game:
+            self._stream_track(request)
+            return
+
+        query = request.query
         try:
             # Ensure cache directory exists
             self.cache_dir.mkdir(parents=True, exist_ok=True)
-            output_template = str(self.cache_dir / "%(title)s.%(ext)s")
+            suffix = ".fast" if request.fast_start else ""
+            output_template = str(self.cache_dir / f"%(title)s{suffix}.%(ext)s")
+
+            if request.fast_start:
+                audio_format = FAST_START_FORMAT
+                audio_quality = FAST_START_AUDIO_QUALITY
+            else:
+                audio_format = get_download_format("bestaudio/best")
+                audio_quality = "192K"
 
             # Configure yt-dlp
             command_args = [
                 f"{str(BASE_DIR)}/yt-dlp.exe",
                 "-f",
-                "bestaudio/best",
+                audio_format,
                 "--no-playlist",
                 "--ffmpeg-location",
                 self.ffmpeg_path,
@@ -121,10 +272,7 @@ class MusicDownloader:
                 "-o",
                 output_template,
                 "--extract-audio",
-                "--audio-format",
-                "mp3",
-                "--audio-quality",
-                "192K",
+                *get_extract_args(audio_quality),
                 # Headers
                 "--user-agent",
                 "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
@@ -132,32 +280,328 @@ class MusicDownloader:
                 "Accept-Language: en-US,en;q=0.9",
                 # A query
                 "--print-json",
-                f"ytsearch1:{query}",
+                *self.governor.ytdlp_args(),
+                request.source or f"ytsearch1:{query}",
             ]
 
             # Download track
             logger.info(f"Downloading: {query}...")
             result = subprocess.run(
-                command_args,
+                self.governor.wrap_command(command_args),
                 check=True,
                 capture_output=True,
                 text=True,
                 encoding="cp1252",
+                **self.governor.process_kwargs(),
             )
             lines = [l for l in result.stdout.splitlines() if l.strip()]
             info = json.loads(lines[-1])
 
-            output_path = Path(info.get("_filename")).with_suffix(".mp3")
-            logger.info(
-                f"File downloaded to: {output_path}. Now normalizing and queueing."
+            output_path = Path(info.get("_filename")).with_suffix(
+                get_output_suffix(info)
             )
-            self._normalize_audio(output_path)
-            self.playback_queue.add_to_queue(str(output_path))
-            logger.info(f"Downloaded and queued: {query}")
+
+            if request.fast_start:
+                if not self._publish(request, output_path, info):
+                    return
+                self.download_queue.put(
+                    DownloadRequest(
+                        query,
+                        source=info.get("webpage_url"),
+                        replaces=str(output_path),
+                        session=request.session,
+                    )
+                )
+                logger.info(f"Fast-start track queued, upgrade scheduled: {query}")
+                return
+
+            if is_passthrough() and not NORMALIZE_PASSTHROUGH_AUDIO:
+                logger.info(f"File downloaded to: {output_path}. Queueing as is.")
+            else:
+                logger.info(
+                    f"File downloaded to: {output_path}. Now normalizing and queueing."
+                )
+                self._normalize_audio(output_path)
+
+            if request.is_upgrade:
+                self._swap_upgrade(Path(request.replaces), output_path)
+                return
+
+            if self._publish(request, output_path, info):
+                logger.info(f"Downloaded and queued: {query}")
 
         except Exception as e:
             logger.error(f"Error downloading track '{query}': {e}")
 
+    def _stream_track(self, request: DownloadRequest) -> None:
+        """
+        Download a track progressively and publish it while it is encoding.
+
+        yt-dlp only resolves the stream URL; FFmpeg reads it directly,
+        normalizes and encodes to MP3 (regardless of the output profile, as
+        the file must be playable while it is incomplete). The file is
+        published to the playback queue as soon as the first
+        STREAMING_PUBLISH_BYTES are written and marked complete in the
+        growing-file registry when FFmpeg exits. A file already cached (or
+        being streamed) under the same title is reused instead of being
+        overwritten. If FFmpeg fails, the partial file is taken off every
+        playlist and deleted.
+
+        Args:
+            request: The download to perform
+        """
+        query = request.query
+        output_path = None
+        process = None
+        published = False
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+            # Resolve the stream URL without downloading
+            result = subprocess.run(
+                self.governor.wrap_command(
+                    [
+                        f"{str(BASE_DIR)}/yt-dlp.exe",
+                        "-f",
+                        "bestaudio/best",
+                        "--no-playlist",
+                        "-q",
+                        "--no-warnings",
+                        "--skip-download",
+                        "--print-json",
+                        request.source or f"ytsearch1:{query}",
+                    ]
+                ),
+                check=True,
+                capture_output=True,
+                text=True,
+                encoding="cp1252",
+                **self.governor.process_kwargs(),
+            )
+            lines = [l for l in result.stdout.splitlines() if l.strip()]
+            info = json.loads(lines[-1])
+
+            title = self.sanitize_filename(info.get("title") or info["id"])
+            output_path = self.cache_dir / f"{title}.mp3"
+            if output_path.exists() or self.growing_files.is_growing(output_path):
+                if self._publish(request, output_path, info):
+                    logger.info(f"Reusing cached stream: {query}")
+                output_path = None  # Owned by the download that wrote it
+                return
+
+            headers = "".join(
+                f"{key}: {value}\r\n"
+                for key, value in info.get("http_headers", {}).items()
+            )
+
+            logger.info(f"Streaming: {query}...")
+            self.growing_files.begin(output_path)
+            process = subprocess.Popen(
+                self.governor.wrap_command(
+                    [
+                        self.ffmpeg_path,
+                        "-headers",
+                        headers,
+                        "-i",
+                        info["url"],
+                        "-vn",
+                        "-af",
+                        "loudnorm=I=-16:TP=-1.5:LRA=11",
+                        "-ar",
+                        "44100",
+                        "-c:a",
+                        "libmp3lame",
+                        "-b:a",
+                        "192k",
+                        *self.governor.ffmpeg_args(),
+                        "-f",
+                        "mp3",
+                        "-y",
+                        str(output_path),
+                    ]
+                ),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                **self.governor.process_kwargs(),
+            )
+
+            published = self.growing_files.wait_for_data(
+                output_path,
+                STREAMING_PUBLISH_BYTES,
+                is_alive=lambda: process.poll() is None,
+                timeout=STREAMING_PUBLISH_TIMEOUT,
+            )
+            if published:
+                self._publish(request, output_path, info)
+                logger.info(f"Published while encoding: {query}")
+
+            if process.wait() != 0:
+                raise subprocess.CalledProcessError(process.returncode, "ffmpeg")
+
+            self.growing_files.finish(output_path)
+            if published:
+                self._finalize(output_path)
+            if published or self._publish(request, output_path, info):
+                logger.info(f"Stream finished and queued: {query}")
+
+        except Exception as e:
+            logger.error(f"Error streaming track '{query}': {e}")
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+            if process is not None:
+                # The file is partial: take it off the playlists and delete it
+                self.playback_queue.remove_track(str(output_path))
+                self.growing_files.finish(output_path)
+                for path in [output_path, *get_derived_files(output_path)]:
+                    try:
+                        path.unlink(missing_ok=True)
+                    except OSError as e:
+                        logger.warning(f"Error deleting {path}: {e}")
+
+        finally:
+            if output_path is not None:
+                self.growing_files.finish(output_path)
+
+    def _publish(self, request: DownloadRequest, path: Path, info: dict) -> bool:
+        """
+        Add a downloaded file to its playlist session.
+
+        The file is deleted if its session has been evicted meanwhile and
+        no other session uses it.
+
+        Args:
+            request: The download that produced the file
+            path: Path of the audio file
+            info: yt-dlp info JSON for the track
+
+        Returns:
+            True if the track was added to the playback queue
+        """
+        track = self.playback_queue.add_to_queue(
+            str(path), duration=info.get("duration"), session=request.session
+        )
+        if track is None:
+            if not self.playback_queue.set_available(str(path), True):
+                path.unlink(missing_ok=True)
+            return False
+
+        if not self.growing_files.is_growing(path):
+            # Fast-start files are replaced soon; analyze the upgrade instead
+            self._finalize(path, analyze=not request.fast_start)
+        return True
+
+    def _finalize(self, path: Path, analyze: bool = True) -> None:
+        """
+        Post-download stage for a complete file.
+
+        Hashes the file so the player can serve it as cacheable, records
+        its size for the session disk budget and, when enabled, computes
+        its waveform peaks and measured duration.
+
+        Args:
+            path: Path of the complete audio file
+            analyze: Whether to compute waveform peaks
+        """
+        try:
+            self.playback_queue.set_etag(str(path), file_etag(path))
+            self.playback_queue.set_size(str(path), path.stat().st_size)
+        except OSError as e:
+            logger.debug(f"Could not hash {path.name}: {e}")
+
+        if analyze and WAVEFORM_ENABLED:
+            self.analyze_track(path)
+
+    def analyze_track(self, path: Path) -> Optional[Waveform]:
+        """
+        Compute and store the waveform peaks and duration of a track.
+
+        FFmpeg decodes the file to low-rate mono PCM, which NumPy reduces
+        to WAVEFORM_PEAK_COUNT min/max pairs.
+
+        Args:
+            path: Path of the complete audio file
+
+        Returns:
+            The waveform, or None if decoding failed
+        """
+        try:
+            result = subprocess.run(
+                self.governor.wrap_command(
+                    [
+                        self.ffmpeg_path,
+                        "-v",
+                        "error",
+                        "-i",
+                        str(path),
+                        "-ac",
+                        "1",
+                        "-ar",
+                        str(WAVEFORM_SAMPLE_RATE),
+                        *self.governor.ffmpeg_args(),
+                        "-f",
+                        "s16le",
+                        "-",
+                    ]
+                ),
+                check=True,
+                capture_output=True,
+                **self.governor.process_kwargs(),
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Could not decode {path.name} for peaks: {e}")
+            return None
+
+        samples = np.frombuffer(result.stdout, dtype="<i2")
+        waveform = Waveform(
+            duration=samples.size / WAVEFORM_SAMPLE_RATE,
+            peaks=compute_peaks(samples, WAVEFORM_PEAK_COUNT),
+        )
+
+        try:
+            save_waveform(path, waveform)
+        except OSError as e:
+            logger.warning(f"Could not store peaks for {path.name}: {e}")
+
+        self.playback_queue.set_duration(str(path), waveform.duration)
+        logger.debug(f"Waveform computed: {path.name} ({waveform.duration:.1f}s)")
+        return waveform
+
+    def get_waveform(self, path: Path) -> Optional[Waveform]:
+        """
+        Get the stored waveform of a track, computing it if missing.
+
+        Args:
+            path: Path of the complete audio file
+
+        Returns:
+            The waveform, or None if it cannot be computed
+        """
+        return load_waveform(path) or self.analyze_track(path)
+
+    def _swap_upgrade(self, fast_path: Path, full_path: Path) -> None:
+        """
+        Replace a fast-start track with its full-quality version.
+
+        Args:
+            fast_path: Path of the published fast-start file
+            full_path: Path of the full-quality file
+        """
+        if not self.playback_queue.replace_track(str(fast_path), str(full_path)):
+            # Playlist moved on; the upgrade is no longer needed
+            full_path.unlink(missing_ok=True)
+            return
+
+        self._finalize(full_path)
+        for path in [fast_path, *get_derived_files(fast_path)]:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                # Still being served; removed with the cache directory later
+                logger.debug(f"Could not remove fast-start file {path}: {e}")
+
+        logger.info(f"Upgraded to full quality: {full_path.name}")
+
     def _normalize_audio(self, path: Path) -> None:
         """
         Normalize audio levels using FFmpeg.
@@ -170,18 +614,22 @@ class MusicDownloader:
 
             # Run FFmpeg normalization
             subprocess.run(
-                [
-                    self.ffmpeg_path,
-                    "-i",
-                    str(path),
-                    "-af",
-                    "loudnorm=I=-16:TP=-1.5:LRA=11",
-                    "-y",
-                    str(normalized_path),
-                ],
+                self.governor.wrap_command(
+                    [
+                        self.ffmpeg_path,
+                        "-i",
+                        str(path),
+                        "-af",
+                        "loudnorm=I=-16:TP=-1.5:LRA=11",
+                        *self.governor.ffmpeg_args(),
+                        "-y",
+                        str(normalized_path),
+                    ]
+                ),
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
                 check=True,
+                **self.governor.process_kwargs(),
             )
 
             # Replace original with normalized version
@@ -207,6 +655,34 @@ class MusicDownloader:
         name = name.strip()
         return name
 
+    def prune_cache(self, keep: Iterable[str]) -> int:
+        """
+        Delete cached files that no playlist refers to.
+
+        Removes leftovers of a previous run (partial downloads, tracks of
+        sessions the journal no longer holds).
+
+        Args:
+            keep: Paths still referenced by the restored playlists
+
+        Returns:
+            Number of deleted files
+        """
+        keep = {str(f) for path in keep for f in [path, *get_derived_files(path)]}
+        deleted = 0
+        for file in self.cache_dir.iterdir():
+            if str(file) in keep or not file.is_file():
+                continue
+            try:
+                file.unlink()
+                deleted += 1
+            except OSError as e:
+                logger.warning(f"Error deleting {file}: {e}")
+
+        if deleted:
+            logger.info(f"Removed {deleted} stale files from the music cache")
+        return deleted
+
     def cleanup(self) -> None:
         """Clean up cache directory."""
         try:
@@ -214,6 +690,7 @@ class MusicDownloader:
                 for file in self.cache_dir.iterdir():
                     try:
                         file.unlink()
+                        self.playback_queue.set_available(str(file), False)
                     except Exception as e:
                         logger.warning(f"Error deleting {file}: {e}")
 
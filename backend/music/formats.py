@@ -0,0 +1,166 @@
+"""
+Audio formats - Output profiles and media types for downloaded tracks.
+Decides whether downloads are transcoded to MP3 or kept in their native codec.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+from config.settings import (
+    AUDIO_OUTPUT_PROFILE,
+    NATIVE_AUDIO_FORMAT,
+    RENDITION_BITRATES,
+)
+
+ETAG_CHUNK_SIZE = 1024 * 1024
+PEAKS_SUFFIX = ".peaks.json"
+
+PROFILE_MP3 = "mp3"
+PROFILE_NATIVE = "native"
+
+QUALITY_ORIGINAL = "original"
+RENDITION_SUFFIX = ".m4a"
+
+# File extension produced by yt-dlp --extract-audio for each source codec
+NATIVE_CODEC_SUFFIXES = {
+    "mp4a": ".m4a",
+    "aac": ".m4a",
+    "opus": ".opus",
+    "vorbis": ".ogg",
+    "mp3": ".mp3",
+    "flac": ".flac",
+}
+
+MEDIA_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".aac": "audio/aac",
+    ".opus": "audio/ogg",
+    ".ogg": "audio/ogg",
+    ".webm": "audio/webm",
+    ".flac": "audio/flac",
+}
+
+
+def is_passthrough() -> bool:
+    """Whether downloads keep their native container instead of MP3."""
+    return AUDIO_OUTPUT_PROFILE == PROFILE_NATIVE
+
+
+def get_download_format(default: str) -> str:
+    """
+    Get the yt-dlp format selector for a full-quality download.
+
+    Args:
+        default: Selector used by the MP3 profile
+
+    Returns:
+        Format selector for the active profile
+    """
+    return NATIVE_AUDIO_FORMAT if is_passthrough() else default
+
+
+def get_extract_args(audio_quality: str) -> List[str]:
+    """
+    Get yt-dlp audio extraction arguments for the active profile.
+
+    Args:
+        audio_quality: MP3 bitrate (ignored in passthrough mode)
+
+    Returns:
+        yt-dlp arguments following --extract-audio
+    """
+    if is_passthrough():
+        return ["--audio-format", "best"]
+    return ["--audio-format", "mp3", "--audio-quality", audio_quality]
+
+
+def get_output_suffix(info: Dict[str, Any]) -> str:
+    """
+    Get the extension of the file yt-dlp produces for a download.
+
+    Args:
+        info: yt-dlp info JSON for the downloaded format
+
+    Returns:
+        File suffix including the dot (e.g. ".mp3")
+    """
+    if not is_passthrough():
+        return ".mp3"
+
+    codec = (info.get("acodec") or "").split(".")[0].lower()
+    return NATIVE_CODEC_SUFFIXES.get(codec, f".{info.get('ext', 'm4a')}")
+
+
+def get_media_type(path: Path) -> str:
+    """
+    Get the HTTP media type for an audio file.
+
+    Args:
+        path: Path to the audio file
+
+    Returns:
+        Media type string, audio/mpeg if unknown
+    """
+    return MEDIA_TYPES.get(Path(path).suffix.lower(), "audio/mpeg")
+
+
+def get_peaks_path(path: Union[str, Path]) -> Path:
+    """
+    Get the path of the waveform peaks stored next to an audio file.
+
+    Args:
+        path: Path to the audio file
+
+    Returns:
+        Path of the peaks file
+    """
+    path = Path(path)
+    return path.with_name(path.name + PEAKS_SUFFIX)
+
+
+def get_rendition_path(path: Union[str, Path], quality: str) -> Path:
+    """
+    Get the path of a lower-bitrate rendition of an audio file.
+
+    Args:
+        path: Path to the original audio file
+        quality: Rendition name from RENDITION_BITRATES
+
+    Returns:
+        Path of the rendition file
+    """
+    path = Path(path)
+    return path.with_name(f"{path.stem}.{quality}{RENDITION_SUFFIX}")
+
+
+def get_derived_files(path: Union[str, Path]) -> List[Path]:
+    """
+    List files generated from an audio file, deleted together with it.
+
+    Args:
+        path: Path to the audio file
+
+    Returns:
+        Paths of derived files (which may not exist)
+    """
+    renditions = [get_rendition_path(path, quality) for quality in RENDITION_BITRATES]
+    return [get_peaks_path(path), *renditions]
+
+
+def file_etag(path: Path) -> str:
+    """
+    Compute a content hash to use as an HTTP entity tag.
+
+    Args:
+        path: Path to a complete audio file
+
+    Returns:
+        Hex digest of the file content (unquoted)
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    with open(path, "rb") as f:
+        while chunk := f.read(ETAG_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
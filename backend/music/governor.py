@@ -0,0 +1,172 @@
+"""
+Resource governor - Throttles background downloads while a match is running.
+Keeps yt-dlp and FFmpeg from competing with the game client for CPU and network.
+"""
+
+import shutil
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from loguru import logger
+
+from config.settings import (
+    DOWNLOAD_WORKER_COUNT,
+    IN_GAME_DOWNLOAD_CONCURRENCY,
+    IN_GAME_DOWNLOAD_RATE_LIMIT,
+    IN_GAME_FFMPEG_THREADS,
+    IN_GAME_NICE_LEVEL,
+)
+
+IS_WINDOWS = sys.platform == "win32"
+
+
+class ResourceGovernor:
+    """
+    Game-aware resource budget for background downloads.
+
+    While the player is in a match, download subprocesses run at a lower
+    priority, FFmpeg is capped to fewer threads, yt-dlp is rate limited and
+    fewer downloads run concurrently. Outside a match the limits are lifted.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ResourceGovernor, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the resource governor."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self._in_game = False
+        self._active_downloads = 0
+        self._condition = threading.Condition()
+        self._nice_path = None if IS_WINDOWS else shutil.which("nice")
+        self._ionice_path = None if IS_WINDOWS else shutil.which("ionice")
+
+    @property
+    def in_game(self) -> bool:
+        """Whether the player is currently in a match."""
+        return self._in_game
+
+    def set_in_game(self, in_game: bool) -> None:
+        """
+        Update the game state and switch resource limits accordingly.
+
+        Args:
+            in_game: True when a match is running
+        """
+        with self._condition:
+            if in_game == self._in_game:
+                return
+
+            self._in_game = in_game
+            self._condition.notify_all()
+
+        if in_game:
+            logger.info(
+                f"Match started: throttling downloads "
+                f"(concurrency={self.max_concurrency}, "
+                f"rate={IN_GAME_DOWNLOAD_RATE_LIMIT}, "
+                f"ffmpeg_threads={IN_GAME_FFMPEG_THREADS})"
+            )
+        else:
+            logger.info("Match ended: download limits lifted")
+
+    @property
+    def max_concurrency(self) -> int:
+        """Number of downloads allowed to run at the same time."""
+        if self._in_game:
+            return max(1, IN_GAME_DOWNLOAD_CONCURRENCY)
+        return DOWNLOAD_WORKER_COUNT
+
+    @contextmanager
+    def download_slot(self) -> Iterator[None]:
+        """
+        Block until a download slot is available under the current budget.
+
+        Workers hold the slot for the whole download and normalization.
+        """
+        with self._condition:
+            while self._active_downloads >= self.max_concurrency:
+                self._condition.wait()
+            self._active_downloads += 1
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active_downloads -= 1
+                self._condition.notify_all()
+
+    def ytdlp_args(self) -> List[str]:
+        """
+        Get extra yt-dlp arguments for the current budget.
+
+        Returns:
+            Rate limit and postprocessor thread arguments (empty outside a match)
+        """
+        if not self._in_game:
+            return []
+
+        args = []
+        if IN_GAME_DOWNLOAD_RATE_LIMIT:
+            args += ["--limit-rate", IN_GAME_DOWNLOAD_RATE_LIMIT]
+        if IN_GAME_FFMPEG_THREADS:
+            args += [
+                "--postprocessor-args",
+                f"ffmpeg:-threads {IN_GAME_FFMPEG_THREADS}",
+            ]
+        return args
+
+    def ffmpeg_args(self) -> List[str]:
+        """
+        Get extra FFmpeg output arguments for the current budget.
+
+        Returns:
+            Thread cap arguments (empty outside a match)
+        """
+        if self._in_game and IN_GAME_FFMPEG_THREADS:
+            return ["-threads", str(IN_GAME_FFMPEG_THREADS)]
+        return []
+
+    def wrap_command(self, command: List[str]) -> List[str]:
+        """
+        Prefix a command with nice/ionice when in a match (POSIX only).
+
+        Args:
+            command: Command line to run
+
+        Returns:
+            Command line, wrapped with the available priority tools
+        """
+        if not self._in_game:
+            return command
+
+        if self._ionice_path:
+            command = [self._ionice_path, "-c", "3", *command]
+        if self._nice_path:
+            command = [self._nice_path, "-n", str(IN_GAME_NICE_LEVEL), *command]
+        return command
+
+    def process_kwargs(self) -> Dict[str, Any]:
+        """
+        Get subprocess keyword arguments that set the process priority.
+
+        On Windows the priority class is set at creation time; on POSIX
+        systems priority is handled by wrap_command instead.
+
+        Returns:
+            Keyword arguments for subprocess.run/Popen
+        """
+        if self._in_game and IS_WINDOWS:
+            return {"creationflags": subprocess.BELOW_NORMAL_PRIORITY_CLASS}
+        return {}
@@ -0,0 +1,249 @@
+"""
+Queue journal - Crash-safe persistence of playlist sessions and pending downloads.
+Appends every queue change to a JSON-lines file and compacts it into snapshots.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+
+from loguru import logger
+
+from config.settings import JOURNAL_COMPACT_EVENTS, STATE_DIR
+
+JOURNAL_FILE_NAME = "queue_journal.jsonl"
+
+Event = Dict[str, Any]
+State = Dict[str, Any]
+
+
+def empty_state() -> State:
+    """Get the state of a backend that has never played anything."""
+    return {"active": None, "sessions": {}, "pending": {}}
+
+
+def _session_state(state: State, key: str) -> Dict[str, Any]:
+    """Get (or create) a session entry in a replayed state."""
+    return state["sessions"].setdefault(key, {"tracks": [], "cursor": -1})
+
+
+def apply_event(state: State, event: Event) -> State:
+    """
+    Apply one journal entry to a replayed state.
+
+    Args:
+        state: State built from the previous entries
+        event: Journal entry
+
+    Returns:
+        The updated state
+    """
+    op = event.get("op")
+    key = event.get("session")
+
+    if op == "snapshot":
+        return {**empty_state(), **event["state"]}
+
+    if op == "activate":
+        session = _session_state(state, key)
+        # Re-insert so dict order keeps least-recently-used first
+        state["sessions"][key] = state["sessions"].pop(key, session)
+        state["active"] = key
+    elif op == "create":
+        # Prepared sessions start least-recently-used
+        session = state["sessions"].pop(key, None) or {"tracks": [], "cursor": -1}
+        state["sessions"] = {key: session, **state["sessions"]}
+    elif op == "add":
+        _session_state(state, key)["tracks"].append(event["track"])
+    elif op == "cursor":
+        session = _session_state(state, key)
+        session["cursor"] = event["cursor"]
+        session["played"] = event.get("played", event["cursor"])
+    elif op == "truncate":
+        session = _session_state(state, key)
+        del session["tracks"][event["start"] : event["end"]]
+        session["cursor"] = event["cursor"]
+        session["played"] = event.get("played", event["cursor"])
+    elif op == "replace":
+        for session in state["sessions"].values():
+            for track in session["tracks"]:
+                if track["path"] == event["old"]:
+                    track["path"] = event["new"]
+    elif op == "evict":
+        state["sessions"].pop(key, None)
+        state["pending"].pop(key, None)
+    elif op == "pending":
+        state["pending"][key] = list(event["queries"])
+    elif op == "extend":
+        state["pending"].setdefault(key, []).extend(event["queries"])
+    elif op == "done":
+        queries = state["pending"].get(key, [])
+        if event["query"] in queries:
+            queries.remove(event["query"])
+
+    return state
+
+
+class QueueJournal:
+    """
+    Append-only journal of playback queue and scheduler changes.
+
+    Callers record small events while holding their own locks; recording
+    only appends to an in-memory buffer, and a writer thread flushes the
+    buffer to disk right away. Once JOURNAL_COMPACT_EVENTS entries pile up,
+    the writer captures a snapshot and atomically replaces the journal with
+    it, so the file stays small and a restart replays at most a few hundred
+    entries. A torn last line (crash mid-write) is ignored on load.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(QueueJournal, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the journal."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self.path = Path(STATE_DIR) / JOURNAL_FILE_NAME
+        self._buffer: Deque[Event] = deque()
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._checkpoint: Optional[Callable[[Callable[[State], None]], None]] = None
+        self._entries = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> State:
+        """
+        Replay the journal from disk.
+
+        Returns:
+            The last recorded state (empty if there is no journal)
+        """
+        state = empty_state()
+        if not self.path.exists():
+            return state
+
+        entries = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning("Ignoring torn entry at end of queue journal")
+                        break
+                    state = apply_event(state, event)
+                    entries += 1
+        except (OSError, KeyError, TypeError) as e:
+            logger.error(f"Could not replay queue journal: {e}")
+            return empty_state()
+
+        self._entries = entries
+        logger.debug(f"Replayed {entries} queue journal entries")
+        return state
+
+    def record(self, op: str, **fields: Any) -> None:
+        """
+        Record a queue change. Never blocks and never touches the disk.
+
+        Args:
+            op: Event type
+            **fields: Event data (must be JSON serializable)
+        """
+        if not self._running:
+            return
+
+        self._buffer.append({"op": op, **fields})
+        self._wakeup.set()
+
+    def start(self, checkpoint: Callable[[Callable[[State], None]], None]) -> None:
+        """
+        Start the writer thread.
+
+        Args:
+            checkpoint: Callable that freezes the queue state, builds a
+                snapshot and hands it to the function it is given
+        """
+        if self._running:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._checkpoint = checkpoint
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="QueueJournal"
+        )
+        self._thread.start()
+        self.compact()
+
+    def stop(self) -> None:
+        """Flush buffered entries and stop the writer thread."""
+        if not self._running:
+            return
+
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered entries to disk."""
+        with self._write_lock:
+            if not self._buffer:
+                return
+
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    while self._buffer:
+                        f.write(json.dumps(self._buffer.popleft()) + "\n")
+                        self._entries += 1
+            except OSError as e:
+                logger.error(f"Error writing queue journal: {e}")
+
+    def compact(self) -> None:
+        """Replace the journal with a snapshot of the current state."""
+        if self._checkpoint is not None:
+            self._checkpoint(self._write_snapshot)
+
+    def _write_snapshot(self, state: State) -> None:
+        """
+        Atomically replace the journal with a single snapshot entry.
+
+        Called by the checkpoint callable while the queue is frozen, so no
+        entry can be recorded between the snapshot and the rewrite.
+        """
+        with self._write_lock:
+            # Entries buffered before the freeze are already in the snapshot
+            self._buffer.clear()
+            tmp_path = self.path.with_suffix(".tmp")
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(json.dumps({"op": "snapshot", "state": state}) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self._entries = 1
+            except OSError as e:
+                logger.error(f"Error compacting queue journal: {e}")
+
+    def _run(self) -> None:
+        """Writer loop: flush entries as they arrive, compact when large."""
+        while self._running:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()
+
+            if self._entries >= JOURNAL_COMPACT_EVENTS:
+                self.compact()
+                logger.debug("Queue journal compacted")
@@ -0,0 +1,266 @@
+"""
+LLM backends - Offline stand-ins for the structured-output chat model.
+A fake model with simulated latency and failures, and record/replay cassettes.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+import typing
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from groq import RateLimitError
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from loguru import logger
+from pydantic import BaseModel
+
+from config.settings import (
+    FAKE_LLM_FAILURE_RATE,
+    FAKE_LLM_JITTER,
+    FAKE_LLM_LATENCY,
+    FAKE_LLM_LIST_LENGTH,
+    FAKE_LLM_RATE_LIMIT_RATE,
+    LLM_CASSETTE_PATH,
+    LLM_REPLAY_LATENCY,
+)
+from music.local_recommender import LocalRecommender
+
+BACKEND_GROQ = "groq"
+BACKEND_FAKE = "fake"
+BACKEND_RECORD = "record"
+BACKEND_REPLAY = "replay"
+BACKENDS = (BACKEND_GROQ, BACKEND_FAKE, BACKEND_RECORD, BACKEND_REPLAY)
+FAKE_MODEL_NAME = "fake"
+CHARS_PER_TOKEN = 4
+
+
+def _structured_result(
+    parsed: BaseModel, input_tokens: int, output_tokens: int
+) -> Dict[str, Any]:
+    """Build what with_structured_output(include_raw=True) returns."""
+    raw = AIMessage(
+        content="",
+        usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+    )
+    return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+
+def _message_text(messages: Any) -> str:
+    """Flatten a prompt value or message list into role-tagged text."""
+    if hasattr(messages, "to_messages"):
+        messages = messages.to_messages()
+    return "\n".join(f"{m.type}: {m.content}" for m in messages)
+
+
+class FakeStructuredModel(Runnable):
+    """
+    Offline stand-in for a chat model with structured output.
+
+    Waits FAKE_LLM_LATENCY +/- FAKE_LLM_JITTER seconds, fails at the
+    configured rates (429s carry a retry-after header, like Groq's), and
+    otherwise returns an instance of the schema with every list holding
+    FAKE_LLM_LIST_LENGTH items. search_query fields are filled with
+    tracks from the local catalog so the result is still playable.
+    """
+
+    def __init__(self, schema: type):
+        """
+        Initialize the fake model.
+
+        Args:
+            schema: Pydantic model to return instances of
+        """
+        self.schema = schema
+        self._rng = random.Random()
+        self._catalog = LocalRecommender().tracks
+
+    def invoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Simulate a structured-output call."""
+        jitter = self._rng.uniform(-FAKE_LLM_JITTER, FAKE_LLM_JITTER)
+        time.sleep(max(0.0, FAKE_LLM_LATENCY + jitter))
+
+        roll = self._rng.random()
+        if roll < FAKE_LLM_RATE_LIMIT_RATE:
+            response = httpx.Response(
+                429,
+                headers={"retry-after": "1"},
+                request=httpx.Request("POST", "https://fake.invalid/chat"),
+            )
+            raise RateLimitError("Fake rate limit", response=response, body=None)
+        if roll < FAKE_LLM_RATE_LIMIT_RATE + FAKE_LLM_FAILURE_RATE:
+            raise RuntimeError("Fake LLM failure")
+
+        parsed = self._build(self.schema)
+        return _structured_result(
+            parsed,
+            len(_message_text(input)) // CHARS_PER_TOKEN,
+            len(parsed.model_dump_json()) // CHARS_PER_TOKEN,
+        )
+
+    def _build(self, schema: type) -> BaseModel:
+        """Create a schema instance with placeholder values."""
+        values = {}
+        for name, field in schema.model_fields.items():
+            values[name] = self._value(schema, name, field.annotation)
+        return schema(**values)
+
+    def _value(self, schema: type, name: str, annotation: Any) -> Any:
+        """Create a placeholder value for one field."""
+        if typing.get_origin(annotation) in (list, List):
+            (item,) = typing.get_args(annotation)
+            return [
+                self._value(schema, name, item) for _ in range(FAKE_LLM_LIST_LENGTH)
+            ]
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return self._build(annotation)
+        if name == "search_query" and self._catalog:
+            return self._rng.choice(self._catalog)
+        return f"{schema.__name__} {name} {self._rng.randrange(1000)}"
+
+
+class LLMCassette:
+    """
+    JSON-lines file of recorded structured-output responses.
+
+    Each entry is keyed by a hash of the model, the schema and the prompt
+    messages, and stores the parsed output, token usage and elapsed time.
+    A key recorded several times is replayed round-robin.
+    """
+
+    def __init__(self, path: Path = LLM_CASSETTE_PATH):
+        """
+        Initialize the cassette and load existing recordings.
+
+        Args:
+            path: Cassette file
+        """
+        self.path = Path(path)
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._replayed: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(model: str, schema: type, messages: Any) -> str:
+        """Hash a call into a cassette key."""
+        text = f"{model}\n{schema.__name__}\n{_message_text(messages)}"
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+    def append(self, key: str, entry: Dict[str, Any]) -> None:
+        """Record a response."""
+        line = json.dumps({"key": key, **entry}, ensure_ascii=False)
+        with self._lock:
+            self._entries[key].append(entry)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def next(self, key: str) -> Dict[str, Any]:
+        """
+        Get the next recorded response for a key.
+
+        Raises:
+            KeyError: If the call was never recorded
+        """
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise KeyError(f"No recorded LLM response for {key}")
+            index = self._replayed[key] % len(entries)
+            self._replayed[key] += 1
+            return entries[index]
+
+    def _load(self) -> None:
+        """Load recordings, skipping a torn last line."""
+        if not self.path.exists():
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._entries[entry.pop("key")].append(entry)
+        logger.debug(f"Loaded {len(self._entries)} recorded LLM calls")
+
+
+class RecordingModel(Runnable):
+    """Structured-output model wrapper that records every response."""
+
+    def __init__(self, model: str, schema: type, llm: Runnable, cassette: LLMCassette):
+        """
+        Initialize the recorder.
+
+        Args:
+            model: Model name, part of the cassette key
+            schema: Pydantic output schema
+            llm: Real model with structured output and include_raw=True
+            cassette: Cassette to record to
+        """
+        self.model = model
+        self.schema = schema
+        self.llm = llm
+        self.cassette = cassette
+
+    def invoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Call the real model and record a successful response."""
+        start = time.perf_counter()
+        result = self.llm.invoke(input, config, **kwargs)
+        if result["parsing_error"] is None:
+            usage = result["raw"].usage_metadata or {}
+            self.cassette.append(
+                self.cassette.make_key(self.model, self.schema, input),
+                {
+                    "parsed": result["parsed"].model_dump(),
+                    "input_tokens": usage.get("input_tokens", 0),
+                    "output_tokens": usage.get("output_tokens", 0),
+                    "elapsed": round(time.perf_counter() - start, 3),
+                },
+            )
+        return result
+
+
+class ReplayModel(Runnable):
+    """Structured-output model that answers from a cassette."""
+
+    def __init__(self, model: str, schema: type, cassette: LLMCassette):
+        """
+        Initialize the replayer.
+
+        Args:
+            model: Model name, part of the cassette key
+            schema: Pydantic output schema
+            cassette: Cassette to replay from
+        """
+        self.model = model
+        self.schema = schema
+        self.cassette = cassette
+
+    def invoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Return the recorded response for the same call."""
+        key = self.cassette.make_key(self.model, self.schema, input)
+        entry = self.cassette.next(key)
+        if LLM_REPLAY_LATENCY:
+            time.sleep(entry["elapsed"])
+        return _structured_result(
+            self.schema.model_validate(entry["parsed"]),
+            entry["input_tokens"],
+            entry["output_tokens"],
+        )
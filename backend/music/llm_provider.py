@@ -0,0 +1,232 @@
+"""
+LLM provider - Process-wide LLM client and prompt templates.
+Parses config.json and prompts.json once and rebuilds only when they change.
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_groq import ChatGroq
+from loguru import logger
+
+from config.settings import BASE_DIR, LLM_BACKEND
+from music.llm_backends import (
+    BACKEND_FAKE,
+    BACKEND_RECORD,
+    BACKEND_REPLAY,
+    BACKENDS,
+    FAKE_MODEL_NAME,
+    FakeStructuredModel,
+    LLMCassette,
+    RecordingModel,
+    ReplayModel,
+)
+from music.rate_limiter import RateLimiter
+
+CONFIG_FILE_NAME = "config.json"
+PROMPTS_FILE_NAME = "prompts.json"
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+LLM_TEMPERATURE = 0.7
+
+
+class LLMProvider:
+    """
+    Thread-safe cache of the LLM client, prompt templates and chains.
+
+    Files are re-read only when their modification time changes, and the
+    ChatGroq client is rebuilt only when the model or API key does, so its
+    HTTP connection pool stays warm across playlists. invalidate() drops
+    everything, for when the configuration is changed through the API.
+
+    The model behind the chains depends on the backend (LLM_BACKEND, or
+    set_backend()): Groq, an offline fake, or Groq recorded to / replayed
+    from a cassette file.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LLMProvider, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the provider."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self.config_path = Path(BASE_DIR) / CONFIG_FILE_NAME
+        self.prompts_path = Path(BASE_DIR) / PROMPTS_FILE_NAME
+        self._lock = threading.RLock()
+        self._files: Dict[Path, Tuple[int, bytes, Any]] = {}
+        self._llm: Optional[ChatGroq] = None
+        self._llm_key: Optional[Tuple[str, str]] = None
+        self._prompts: Dict[str, ChatPromptTemplate] = {}
+        self._chains: Dict[Tuple[str, type, str], Runnable] = {}
+        self._cassette: Optional[LLMCassette] = None
+        self.backend = LLM_BACKEND
+
+    def set_backend(self, backend: str) -> None:
+        """
+        Switch the LLM backend for subsequent chains.
+
+        Args:
+            backend: One of BACKENDS
+
+        Raises:
+            ValueError: If the backend is unknown
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown LLM backend: {backend}")
+        self.backend = backend
+        self.invalidate()
+
+    def get_config(self) -> Dict[str, Any]:
+        """Get the parsed config.json (model and API key)."""
+        return self._load(self.config_path)
+
+    def get_model_name(self) -> str:
+        """Get the configured model name ("fake" for the fake backend)."""
+        if self.backend == BACKEND_FAKE:
+            return FAKE_MODEL_NAME
+        return self.get_config().get("model", DEFAULT_MODEL)
+
+    def get_llm(self) -> ChatGroq:
+        """
+        Get the chat model for the current configuration.
+
+        Returns:
+            The shared ChatGroq client, rebuilt if the model or key changed
+        """
+        config = self.get_config()
+        key = (config.get("model", DEFAULT_MODEL), config.get("api_key") or "")
+
+        with self._lock:
+            if self._llm is None or self._llm_key != key:
+                model, api_key = key
+                kwargs = {"api_key": api_key} if api_key else {}
+                self._llm = ChatGroq(model=model, temperature=LLM_TEMPERATURE, **kwargs)
+                self._llm_key = key
+                self._chains.clear()
+                logger.debug(f"LLM client created for {model}")
+            return self._llm
+
+    def get_prompt(self, name: str) -> ChatPromptTemplate:
+        """
+        Get a compiled prompt template from prompts.json.
+
+        Args:
+            name: Prompt key in prompts.json
+
+        Returns:
+            Prompt template built from the key's list of messages
+
+        Raises:
+            KeyError: If the key is not in prompts.json
+        """
+        data = self._load(self.prompts_path)
+
+        with self._lock:
+            prompt = self._prompts.get(name)
+            if prompt is None:
+                if name not in data:
+                    raise KeyError(f"Chave '{name}' não encontrada no JSON.")
+                messages = [(msg["role"], msg["content"]) for msg in data[name]]
+                prompt = ChatPromptTemplate.from_messages(messages)
+                self._prompts[name] = prompt
+            return prompt
+
+    def get_chain(self, prompt_name: str, schema: type) -> Runnable:
+        """
+        Get a prompt piped into the model with structured output.
+
+        Every call of the chain goes through the shared RateLimiter, so
+        invoke, batch and batch_as_completed all queue behind the model's
+        request and token limits.
+
+        Args:
+            prompt_name: Prompt key in prompts.json
+            schema: Pydantic model of the expected output
+
+        Returns:
+            Runnable chain, reused until the config or prompts change
+        """
+        model = self.get_model_name()
+        prompt = self.get_prompt(prompt_name)
+
+        with self._lock:
+            chain = self._chains.get((prompt_name, schema, model))
+            if chain is None:
+                structured = self._structured_model(model, schema)
+                limiter = RateLimiter()
+
+                def invoke(inputs: Dict[str, Any], config: RunnableConfig) -> Any:
+                    return limiter.invoke(model, prompt, structured, inputs, config)
+
+                chain = RunnableLambda(invoke, name=prompt_name)
+                self._chains[(prompt_name, schema, model)] = chain
+            return chain
+
+    def _structured_model(self, model: str, schema: type) -> Runnable:
+        """Build the backend's structured-output model (lock must be held)."""
+        if self.backend == BACKEND_FAKE:
+            return FakeStructuredModel(schema)
+
+        if self.backend in (BACKEND_RECORD, BACKEND_REPLAY):
+            if self._cassette is None:
+                self._cassette = LLMCassette()
+            if self.backend == BACKEND_REPLAY:
+                return ReplayModel(model, schema, self._cassette)
+
+        structured = self.get_llm().with_structured_output(schema, include_raw=True)
+        if self.backend == BACKEND_RECORD:
+            return RecordingModel(model, schema, structured, self._cassette)
+        return structured
+
+    def get_prompt_version(self) -> str:
+        """Get a short hash of prompts.json that changes with any edit."""
+        self._load(self.prompts_path)
+        with self._lock:
+            raw = self._files[self.prompts_path][1]
+        return hashlib.blake2b(raw, digest_size=6).hexdigest()
+
+    def invalidate(self) -> None:
+        """Drop every cached file, client, prompt and chain."""
+        with self._lock:
+            self._files.clear()
+            self._llm = None
+            self._llm_key = None
+            self._prompts.clear()
+            self._chains.clear()
+            self._cassette = None
+        logger.debug("LLM provider cache invalidated")
+
+    def _load(self, path: Path) -> Any:
+        """
+        Get a parsed JSON file, re-reading it if its mtime changed.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        mtime = path.stat().st_mtime_ns
+
+        with self._lock:
+            cached = self._files.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[2]
+
+            raw = path.read_bytes()
+            data = json.loads(raw)
+            self._files[path] = (mtime, raw, data)
+            # Chains capture the model, client and prompt they were built with
+            self._chains.clear()
+            if path == self.prompts_path:
+                self._prompts.clear()
+            return data
@@ -0,0 +1,189 @@
+"""
+Local recommender - Offline playlists from a bundled genre catalog.
+Maps champion tags, region and palette to genre weights and samples tracks.
+"""
+
+import colorsys
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from config.settings import BASE_DIR, LOCAL_PALETTE_WEIGHT
+from schemas import Champion
+
+CATALOG_FILE_NAME = "catalog.json"
+PALETTE_FEATURES = ("dark", "bright", "warm", "cool")
+
+
+def palette_features(palette: List[str]) -> np.ndarray:
+    """
+    Describe a color palette by how dark, bright, warm and cool it is.
+
+    Args:
+        palette: Hex colors ("#rrggbb")
+
+    Returns:
+        Array of PALETTE_FEATURES scores between 0 and 1 (zeros if empty)
+    """
+    colors = []
+    for color in palette:
+        try:
+            rgb = bytes.fromhex(color.lstrip("#")[:6])
+        except ValueError:
+            continue
+        if len(rgb) == 3:
+            colors.append(colorsys.rgb_to_hsv(*(c / 255 for c in rgb)))
+
+    if not colors:
+        return np.zeros(len(PALETTE_FEATURES))
+
+    hue, saturation, value = np.asarray(colors).T
+    degrees = hue * 360
+    warm = (degrees < 60) | (degrees >= 330)
+    cool = (degrees >= 180) & (degrees < 300)
+    # Unsaturated colors have no meaningful hue
+    colorful = saturation > 0.2
+
+    return np.array(
+        [
+            1 - value.mean(),
+            (value * saturation).mean(),
+            (warm & colorful).mean(),
+            (cool & colorful).mean(),
+        ]
+    )
+
+
+class LocalRecommender:
+    """
+    Offline recommender over the tracks listed in catalog.json.
+
+    The catalog maps champion tags, regions and palette features to genre
+    weights and lists the genres of each track. A champion's genre weights
+    are projected onto the tracks with one matrix product, and tracks are
+    drawn without replacement with probability proportional to their
+    weight. Used for the first tracks while the LLM is still generating,
+    and as the whole playlist when the LLM is unavailable.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LocalRecommender, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the recommender and index the catalog."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self.path = Path(BASE_DIR) / CATALOG_FILE_NAME
+        self._rng = np.random.default_rng()
+        self._lock = threading.Lock()
+        self.tracks: List[str] = []
+        self.genres: List[str] = []
+        self._load()
+
+    def recommend(
+        self, champion: Champion, max_tracks: int, exclude: Optional[set] = None
+    ) -> List[str]:
+        """
+        Sample tracks for a champion.
+
+        Args:
+            champion: Champion to recommend for
+            max_tracks: Maximum number of tracks to return
+            exclude: Tracks not to return (compared case-insensitively)
+
+        Returns:
+            Track strings in format "Track Name - Artist Name"
+        """
+        if not self.tracks or max_tracks <= 0:
+            return []
+
+        weights = self._track_matrix @ self.genre_weights(champion)
+        if exclude:
+            excluded = {q.lower() for q in exclude}
+            weights[[t.lower() in excluded for t in self.tracks]] = 0
+
+        candidates = np.count_nonzero(weights)
+        if candidates == 0:
+            return []
+
+        with self._lock:
+            picks = self._rng.choice(
+                len(self.tracks),
+                size=min(max_tracks, candidates),
+                replace=False,
+                p=weights / weights.sum(),
+            )
+        return [self.tracks[i] for i in picks]
+
+    def genre_weights(self, champion: Champion) -> np.ndarray:
+        """
+        Weight every catalog genre for a champion.
+
+        Args:
+            champion: Champion to weight genres for
+
+        Returns:
+            Non-negative weight per genre, uniform if nothing matched
+        """
+        weights = self._tag_matrix[
+            [self._tag_index[t] for t in champion.tags if t in self._tag_index]
+        ].sum(axis=0)
+
+        region = self._region_index.get(champion.region)
+        if region is not None:
+            weights = weights + self._region_matrix[region]
+
+        features = palette_features(champion.palette)
+        weights = weights + LOCAL_PALETTE_WEIGHT * features @ self._palette_matrix
+
+        if not weights.any():
+            return np.ones(len(self.genres))
+        return weights
+
+    def _load(self) -> None:
+        """Read the catalog and build the weight matrices."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                catalog = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Local catalog unavailable: {e}")
+            catalog = {}
+
+        tracks: Dict[str, List[str]] = catalog.get("tracks", {})
+        self.tracks = list(tracks)
+        self.genres = sorted({g for genres in tracks.values() for g in genres})
+        genre_index = {g: i for i, g in enumerate(self.genres)}
+
+        def matrix(rows: List[Dict[str, float]]) -> np.ndarray:
+            result = np.zeros((len(rows), len(self.genres)))
+            for i, row in enumerate(rows):
+                for genre, weight in row.items():
+                    if genre in genre_index:
+                        result[i, genre_index[genre]] = weight
+            return result
+
+        tags = catalog.get("tags", {})
+        regions = catalog.get("regions", {})
+        palette = catalog.get("palette", {})
+
+        self._track_matrix = matrix([dict.fromkeys(g, 1.0) for g in tracks.values()])
+        self._tag_index = {tag: i for i, tag in enumerate(tags)}
+        self._tag_matrix = matrix(list(tags.values()))
+        self._region_index = {region: i for i, region in enumerate(regions)}
+        self._region_matrix = matrix(list(regions.values()))
+        self._palette_matrix = matrix([palette.get(f, {}) for f in PALETTE_FEATURES])
+
+        logger.debug(
+            f"Local catalog: {len(self.tracks)} tracks in {len(self.genres)} genres"
+        )
@@ -3,11 +3,14 @@ Playlist generator - High-level playlist generation and management.
 Coordinates recommendation and download for complete playlist creation.
 """
 
+from contextlib import closing
+from typing import Callable
+
 from loguru import logger
 
-from music.download import MusicDownloader
 from music.queue import PlaybackQueue
 from music.recommendations import RecommendationEngine
+from music.scheduler import DownloadScheduler
 from schemas import Champion
 
 
@@ -21,40 +24,100 @@ class PlaylistGenerator:
     def __init__(self):
         """Initialize the playlist generator."""
         self.recommendation_engine = RecommendationEngine()
-        self.downloader = MusicDownloader()
+        self.scheduler = DownloadScheduler()
         self.queue = PlaybackQueue()
 
     def generate_for_champion(self, champion: Champion, max_tracks: int = 100) -> None:
         """
-        Generate and queue a playlist for a champion.
+        Generate and schedule a playlist for a champion.
+
+        Recommendations are scheduled batch by batch as they are generated,
+        and tracks are downloaded just in time by the DownloadScheduler as
+        the playback buffer drains. If the champion's session is still warm, it
+        is resumed instantly instead of being regenerated.
 
         Args:
             champion: Champion to generate playlist for
             max_tracks: Maximum number of tracks
         """
         try:
+            session = champion.id
+
+            if self.queue.is_warm(session):
+                self.queue.activate_session(session)
+                self.scheduler.activate_session(session)
+                logger.info(f"Resumed playlist session for {champion.name}")
+                return
+
             logger.info(f"Generating playlist for {champion.name}")
 
-            # Get recommendations
-            tracks = self.recommendation_engine.get_recommendations(
+            # Schedule each batch of recommendations as soon as it arrives,
+            # so the first downloads overlap with the remaining LLM calls
+            scheduled = 0
+            for tracks in self.recommendation_engine.stream_recommendations(
                 champion, max_tracks=max_tracks
-            )
+            ):
+                if scheduled == 0:
+                    # Switch to a fresh session for this champion
+                    self.queue.activate_session(session)
+                    self.queue.clear_all()
+                    logger.debug("Cleared existing playlist")
+                    self.scheduler.set_playlist(tracks, session=session)
+                else:
+                    self.scheduler.extend_playlist(tracks, session=session)
+                scheduled += len(tracks)
 
-            if not tracks:
+            if not scheduled:
                 logger.warning(f"No tracks found for {champion.name}")
                 return
 
-            # Clear existing playlist
-            self.queue.clear_all()
-            logger.debug("Cleared existing playlist")
-
-            # Queue tracks for download
-            for track in tracks:
-                self.downloader.queue_download(track)
-
-            logger.info(
-                f"Queued {len(tracks)} tracks for download " f"for {champion.name}"
-            )
+            logger.info(f"Scheduled {scheduled} tracks for {champion.name}")
 
         except Exception as e:
             logger.error(f"Error generating playlist for {champion.name}: {e}")
+
+    def prepare_for_champion(
+        self,
+        champion: Champion,
+        max_tracks: int,
+        download_count: int,
+        should_stop: Callable[[], bool],
+    ) -> bool:
+        """
+        Prepare a champion's playlist ahead of time in an inactive session.
+
+        The playlist is generated (or read from the cache) and its first
+        tracks downloaded, so picking the champion later resumes a warm
+        session. Generation is abandoned as soon as should_stop() is true.
+
+        Args:
+            champion: Champion to prepare a playlist for
+            max_tracks: Maximum number of tracks
+            download_count: Tracks to download now
+            should_stop: Polled between recommendation batches
+
+        Returns:
+            True if a session was prepared
+        """
+        session = champion.id
+        if self.queue.has_session(session):
+            return False
+
+        tracks = []
+        stream = self.recommendation_engine.stream_recommendations(
+            champion, max_tracks=max_tracks
+        )
+        # Closing the stream early still caches what was generated so far
+        with closing(stream):
+            for batch in stream:
+                if should_stop():
+                    logger.debug(f"Stopped preparing playlist for {champion.name}")
+                    return False
+                tracks.extend(batch)
+
+        if not tracks or should_stop() or not self.queue.create_session(session):
+            return False
+
+        self.scheduler.prepare_session(tracks, session, download_count)
+        logger.info(f"Prepared playlist for {champion.name} ({len(tracks)} tracks)")
+        return True
@@ -0,0 +1,100 @@
+"""
+Track prefetcher - Warms upcoming tracks into the OS page cache.
+Lets the next track start from memory instead of disk at track boundaries.
+"""
+
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from config.settings import PREFETCH_CHUNK_SIZE
+
+HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+
+class TrackPrefetcher:
+    """
+    Page cache prefetcher for upcoming tracks.
+
+    On POSIX systems the kernel is asked to read the file ahead with
+    posix_fadvise(WILLNEED), which returns immediately. Elsewhere (Windows)
+    a single background thread reads the file once and discards the data,
+    leaving it in the OS file cache.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TrackPrefetcher, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the prefetcher."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self._requests: "queue.Queue[Path]" = queue.Queue()
+        self._last: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def warm(self, path: Path) -> None:
+        """
+        Start loading a file into the page cache. Never blocks.
+
+        Args:
+            path: Audio file expected to play soon
+        """
+        if str(path) == self._last:
+            return
+        self._last = str(path)
+
+        if HAS_FADVISE:
+            self._fadvise(path)
+            return
+
+        self._ensure_thread()
+        self._requests.put(path)
+
+    @staticmethod
+    def _fadvise(path: Path) -> None:
+        """Ask the kernel to read the whole file ahead."""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+            logger.debug(f"Prefetched: {path.name}")
+        except OSError as e:
+            logger.debug(f"Prefetch failed for {path.name}: {e}")
+
+    def _ensure_thread(self) -> None:
+        """Start the read-ahead thread on first use."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._read_ahead_worker, daemon=True, name="Prefetcher"
+                )
+                self._thread.start()
+
+    def _read_ahead_worker(self) -> None:
+        """Read requested files sequentially, discarding the data."""
+        while True:
+            path = self._requests.get()
+            try:
+                with open(path, "rb", buffering=0) as f:
+                    while f.read(PREFETCH_CHUNK_SIZE):
+                        pass
+                logger.debug(f"Prefetched: {path.name}")
+            except OSError as e:
+                logger.debug(f"Prefetch failed for {path.name}: {e}")
+            finally:
+                self._requests.task_done()
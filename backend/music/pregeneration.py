@@ -0,0 +1,195 @@
+"""
+Playlist pre-generation - Prepares playlists for favourite champions between games.
+Tracks how often each champion is played and warms their sessions while idle.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List
+
+from loguru import logger
+
+from config.settings import (
+    PREGENERATION_DAILY_LLM_LIMIT,
+    PREGENERATION_ENABLED,
+    PREGENERATION_INTERVAL,
+    PREGENERATION_MIN_FREE_DISK_MB,
+    PREGENERATION_TOP_K,
+    PREGENERATION_TRACKS,
+    SESSION_MAX_COUNT,
+    STATE_DIR,
+    TRACK_COUNT,
+)
+from music.download import MusicDownloader
+from music.governor import ResourceGovernor
+from music.playlist import PlaylistGenerator
+from music.queue import PlaybackQueue
+from schemas import Champion
+
+STATS_FILE_NAME = "play_stats.json"
+DAY_SECONDS = 24 * 3600
+
+
+class PlaylistPregenerator:
+    """
+    Low-priority job that prepares playlists for the most played champions.
+
+    Every champion pick is counted. While no match is running and the
+    download queue is empty, one of the top PREGENERATION_TOP_K champions
+    without a session gets its playlist generated (or read from the
+    recommendation cache) and its first PREGENERATION_TRACKS downloaded
+    into an inactive session. Runs that need the LLM are capped at
+    PREGENERATION_DAILY_LLM_LIMIT per day, charged as they start (even if
+    a match interrupts them) and counted in the statistics file so
+    restarts do not reset the count. Nothing runs while the cache disk
+    is short of PREGENERATION_MIN_FREE_DISK_MB, and work stops as soon as
+    a match starts.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PlaylistPregenerator, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the pre-generator and load play statistics."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self.path = Path(STATE_DIR) / STATS_FILE_NAME
+        self.governor = ResourceGovernor()
+        self.downloader = MusicDownloader()
+        self.queue = PlaybackQueue()
+        self.playlist_generator = PlaylistGenerator()
+        # Prepared sessions are evicted first, so keep room for real ones
+        self.top_k = min(PREGENERATION_TOP_K, SESSION_MAX_COUNT - 2)
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._llm_runs: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._load()
+
+    def record_play(self, champion: Champion) -> None:
+        """
+        Count a game played with a champion.
+
+        Args:
+            champion: Champion picked by the player
+        """
+        with self._lock:
+            entry = self._stats.setdefault(champion.id, {"plays": 0})
+            entry["plays"] += 1
+            entry["last_played"] = time.time()
+            entry["champion"] = champion.model_dump(exclude={"splash"})
+            self._save()
+
+    def get_top_champions(self) -> List[Champion]:
+        """Get the most played champions, most played first."""
+        with self._lock:
+            entries = sorted(
+                self._stats.values(),
+                key=lambda e: (e["plays"], e["last_played"]),
+                reverse=True,
+            )[: self.top_k]
+            return [Champion(**e["champion"], splash=None) for e in entries]
+
+    def run(self) -> None:
+        """Check for idle time periodically until stop() is called."""
+        if not PREGENERATION_ENABLED or self.top_k <= 0:
+            return
+
+        logger.info(f"Playlist pre-generation enabled (top {self.top_k} champions)")
+        while not self._stop.wait(PREGENERATION_INTERVAL):
+            try:
+                if self._is_idle():
+                    self._prepare_next()
+            except Exception as e:
+                logger.error(f"Error pre-generating playlists: {e}")
+
+    def stop(self) -> None:
+        """Stop the pre-generation loop."""
+        self._stop.set()
+
+    def _should_stop(self) -> bool:
+        """Whether in-progress work must be abandoned."""
+        return self._stop.is_set() or self.governor.in_game
+
+    def _is_idle(self) -> bool:
+        """Whether there is spare time, bandwidth and disk for preparing."""
+        if self._should_stop() or not self.downloader.download_queue.empty():
+            return False
+
+        free_mb = shutil.disk_usage(self.downloader.cache_dir).free / (1024 * 1024)
+        if free_mb < PREGENERATION_MIN_FREE_DISK_MB:
+            logger.debug(f"Skipping pre-generation: {free_mb:.0f} MB free")
+            return False
+        return True
+
+    def _prepare_next(self) -> None:
+        """Prepare the first top champion that has no session yet."""
+        engine = self.playlist_generator.recommendation_engine
+        with self._lock:
+            now = time.time()
+            while self._llm_runs and now - self._llm_runs[0] > DAY_SECONDS:
+                self._llm_runs.popleft()
+            llm_budget = PREGENERATION_DAILY_LLM_LIMIT - len(self._llm_runs)
+
+        for champion in self.get_top_champions():
+            if self.queue.has_session(champion.id):
+                continue
+
+            uses_llm = not engine.has_cached(champion)
+            if uses_llm and llm_budget <= 0:
+                continue
+            if uses_llm:
+                # Charged up front: an interrupted run has spent calls too
+                with self._lock:
+                    self._llm_runs.append(time.time())
+                    self._save()
+
+            self.playlist_generator.prepare_for_champion(
+                champion,
+                max_tracks=TRACK_COUNT,
+                download_count=PREGENERATION_TRACKS,
+                should_stop=self._should_stop,
+            )
+            return
+
+    def _load(self) -> None:
+        """Load play statistics, ignoring a missing or corrupt file."""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._stats = data.get("champions", {})
+            self._llm_runs = deque(data.get("llm_runs", []))
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable play statistics: {e}")
+            self._stats = {}
+            self._llm_runs = deque()
+
+    def _save(self) -> None:
+        """Write play statistics atomically (lock must be held)."""
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"champions": self._stats, "llm_runs": list(self._llm_runs)},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Error saving play statistics: {e}")
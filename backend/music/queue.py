@@ -1,80 +1,360 @@
 """
 Playback queue - Manages music playback queue and history.
-Handles ready-to-play tracks and play history.
+Handles ready-to-play tracks and play history, one session per champion.
 """
 
-import queue
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from loguru import logger
 
-# Shared queues
-_ready_queue = queue.Queue()
-_played_stack: List[str] = []
+from config.settings import (
+    ESTIMATED_TRACK_DURATION,
+    SESSION_DISK_BUDGET_MB,
+    SESSION_MAX_COUNT,
+)
+from music.formats import get_derived_files
+
+DEFAULT_SESSION = "default"
+
+
+def _new_track_id() -> str:
+    """Generate a short, URL-safe track ID."""
+    return uuid.uuid4().hex[:12]
+
+
+@dataclass
+class Track:
+    """
+    A track in the playlist.
+
+    Attributes:
+        path: Path to the audio file
+        duration: Track length in seconds, if known
+        id: Stable identifier, kept when the file is replaced
+        available: Whether the file is known to exist on disk
+        etag: Content hash of the file, None until computed
+        size: File size in bytes, 0 until the file is complete
+    """
+
+    path: str
+    duration: Optional[float] = None
+    id: str = field(default_factory=_new_track_id)
+    available: bool = True
+    etag: Optional[str] = None
+    size: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the track for the queue journal."""
+        return {"id": self.id, "path": self.path, "duration": self.duration}
+
+
+class _Session:
+    """
+    One playlist: an array-backed ring of tracks with a play cursor.
+
+    Tracks up to the cursor are the play history, tracks after it are ready
+    to play. Tracks up to the high-water mark have been played at least
+    once, even after the cursor wraps around or moves back; only the ones
+    after it count as download buffer. Not thread-safe; PlaybackQueue holds
+    its lock around all calls.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.tracks: List[Track] = []
+        self.cursor = -1  # Index of the current track, -1 before first play
+        self.played = -1  # Highest index played so far
+        self.by_id: Dict[str, Track] = {}
+        self.by_path: Dict[str, Track] = {}
+        self.available_count = 0
+        self.disk_bytes = 0  # Total size of available tracks
+
+    def add(self, track: Track) -> None:
+        """Append a track to the ring."""
+        self.tracks.append(track)
+        self.by_id[track.id] = track
+        self.by_path[track.path] = track
+        self.available_count += int(track.available)
+        self.disk_bytes += track.size if track.available else 0
+
+    def seek(self, step: int) -> Optional[Track]:
+        """
+        Move the cursor by step until it lands on an available track.
+
+        Visits each track at most once.
+
+        Args:
+            step: 1 to move forward, -1 to move back
+
+        Returns:
+            The track under the cursor, or None if none is available
+        """
+        if self.available_count == 0:
+            return None
+
+        for _ in range(len(self.tracks)):
+            if step > 0 and self.cursor + 1 >= len(self.tracks):
+                # Wrapping around: every track has been reached
+                self.played = len(self.tracks) - 1
+            self.cursor = (self.cursor + step) % len(self.tracks)
+            track = self.tracks[self.cursor]
+            if track.available:
+                if step > 0:
+                    self.played = max(self.played, self.cursor)
+                return track
+
+        return None
+
+    def set_available(self, track: Track, available: bool) -> None:
+        """Flip a track's availability and keep the count in sync."""
+        if track.available != available:
+            track.available = available
+            self.available_count += 1 if available else -1
+            self.disk_bytes += track.size if available else -track.size
+
+    def set_size(self, track: Track, size: int) -> None:
+        """Update a track's file size and keep the total in sync."""
+        if track.available:
+            self.disk_bytes += size - track.size
+        track.size = size
+
+    def truncate(self, start: int, end: int) -> None:
+        """Remove tracks[start:end] and rebuild the indexes."""
+        for track in self.tracks[start:end]:
+            self.by_id.pop(track.id, None)
+            self.by_path.pop(track.path, None)
+        del self.tracks[start:end]
+        if self.played >= end:
+            self.played -= end - start
+        elif self.played >= start:
+            self.played = start - 1
+        self.available_count = sum(track.available for track in self.tracks)
+        self.disk_bytes = sum(t.size for t in self.tracks if t.available)
+
+    def upcoming(self) -> List[Track]:
+        """Tracks after the cursor."""
+        return self.tracks[self.cursor + 1 :]
+
+    def unplayed(self) -> List[Track]:
+        """Tracks after the high-water mark, never played yet."""
+        return self.tracks[self.played + 1 :]
 
 
 class PlaybackQueue:
     """
     Playback queue manager.
 
-    Manages the queue of ready-to-play tracks and play history.
+    Keeps one session per champion, each an array-backed ring with its own
+    ready list, history and cursor. Moving next/previous and recycling only
+    move the active session's cursor, and switching champions swaps the
+    active session, so going back to a recent champion resumes instantly.
+    Inactive sessions are evicted least-recently-used first, together with
+    their files, to stay within SESSION_MAX_COUNT and SESSION_DISK_BUDGET_MB.
+
+    All state is guarded by a single lock, so download workers and HTTP
+    handlers can use the queue concurrently. File availability is tracked
+    in memory: the downloader and cache cleanup report files that appear or
+    disappear, and navigation skips unavailable tracks without stat calls.
+
+    When a journal is attached, every change is recorded to it so the
+    sessions can be restored after a restart.
     """
 
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PlaybackQueue, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
     def __init__(self):
         """Initialize the playback queue."""
-        self.ready_queue = _ready_queue
-        self.played_stack = _played_stack
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self._active = _Session(DEFAULT_SESSION)
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict(
+            [(DEFAULT_SESSION, self._active)]
+        )
+        self._lock = threading.RLock()
+        self._journal = None
+
+    @property
+    def active_session(self) -> str:
+        """Key of the session currently being played."""
+        return self._active.key
+
+    def activate_session(self, key: str) -> bool:
+        """
+        Make a session the active one, creating it if needed.
+
+        Args:
+            key: Session key (the champion ID)
 
-    def add_to_queue(self, file_path: str) -> None:
+        Returns:
+            True if the session already had playable tracks (warm resume)
+        """
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = _Session(key)
+                self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            self._active = session
+            warm = session.available_count > 0
+            self._record("activate", session=key)
+
+            self._enforce_budget()
+
+        logger.info(f"Active session: {key} ({'warm' if warm else 'new'})")
+        return warm
+
+    def create_session(self, key: str) -> bool:
         """
-        Add a track to the playback queue.
+        Create an inactive session, ranked least recently used.
+
+        Used to prepare a champion's playlist ahead of time; such sessions
+        are the first to go when the budget is exceeded.
+
+        Args:
+            key: Session key (the champion ID)
+
+        Returns:
+            True if the session was created and fits the budget
+        """
+        with self._lock:
+            if key in self._sessions:
+                return False
+
+            self._sessions[key] = _Session(key)
+            self._sessions.move_to_end(key, last=False)
+            self._record("create", session=key)
+
+            self._enforce_budget()
+            return key in self._sessions
+
+    def has_session(self, key: str) -> bool:
+        """Check whether a session is still held (not evicted)."""
+        return key in self._sessions
+
+    def is_warm(self, key: str) -> bool:
+        """Check whether a session exists and has playable tracks."""
+        session = self._sessions.get(key)
+        return session is not None and session.available_count > 0
+
+    def add_to_queue(
+        self,
+        file_path: str,
+        duration: Optional[float] = None,
+        session: Optional[str] = None,
+    ) -> Optional[Track]:
+        """
+        Add a track to the end of a session's playlist.
+
+        A path that is already in the playlist is not added twice; the
+        existing track is marked available again instead.
 
         Args:
             file_path: Path to the audio file
+            duration: Track length in seconds, if known
+            session: Target session key (defaults to the active session)
+
+        Returns:
+            The added (or existing) track, or None if the session was evicted
         """
-        self.ready_queue.put(file_path)
+        with self._lock:
+            target = self._get_session(session)
+            if target is None:
+                logger.debug(f"Session {session} no longer exists, dropping track")
+                return None
+
+            existing = target.by_path.get(file_path)
+            if existing is not None:
+                target.set_available(existing, True)
+                return existing
+
+            track = Track(
+                path=file_path, duration=float(duration) if duration else None
+            )
+            target.add(track)
+            self._record("add", session=target.key, track=track.to_dict())
+
         logger.debug(f"Added to queue: {Path(file_path).name}")
+        return track
 
-    def get_next(self) -> Optional[Path]:
+    def next_track(self) -> Optional[Track]:
         """
-        Get the next track from the queue.
+        Advance the cursor to the next available track.
 
-        If queue is empty, recycles played tracks.
+        When the end of the playlist is reached, wraps around to the start
+        (recycling played tracks). Unavailable tracks are skipped using the
+        availability index, without touching the disk.
 
         Returns:
-            Path to next track or None if no tracks available
+            The next track or None if no tracks are available
         """
-        # If queue is empty, recycle played tracks
-        if self.ready_queue.empty():
-            if self.played_stack:
+        with self._lock:
+            session = self._active
+            if session.tracks and session.cursor + 1 >= len(session.tracks):
                 logger.info("Queue empty, recycling played tracks")
-                for track in self.played_stack:
-                    self.ready_queue.put(track)
-                self.played_stack.clear()
-            else:
-                logger.warning("No tracks available in queue or history")
-                return None
 
-        # Get next track
-        try:
-            path_str = self.ready_queue.get()
-            path = Path(path_str)
+            track = session.seek(1)
+            if track is not None:
+                self._record_cursor(session)
+
+        if track is None:
+            logger.warning("No tracks available in queue or history")
+            return None
+
+        logger.debug(f"Next track: {Path(track.path).name}")
+        return track
 
-            if not path.exists():
-                logger.error(f"Track file not found: {path}")
-                return self.get_next()
+    def previous_track(self) -> Optional[Track]:
+        """
+        Move the cursor back to the previous available track.
+
+        Before the first track, wraps around to the most recently added one.
+        With a single track, replays it.
 
-            # Add to history
-            self.played_stack.append(path_str)
-            logger.debug(f"Next track: {path.name}")
+        Returns:
+            The previous track or None if nothing was played yet
+        """
+        with self._lock:
+            if self._active.cursor < 0:
+                logger.warning("No tracks in play history")
+                return None
 
-            return path
+            track = self._active.seek(-1)
+            if track is not None:
+                self._record_cursor(self._active)
 
-        except Exception as e:
-            logger.error(f"Error getting next track: {e}")
+        if track is None:
+            logger.warning("No available tracks in play history")
             return None
 
+        logger.debug(f"Previous track: {Path(track.path).name}")
+        return track
+
+    def get_next(self) -> Optional[Path]:
+        """
+        Get the next track from the queue.
+
+        If queue is empty, recycles played tracks.
+
+        Returns:
+            Path to next track or None if no tracks available
+        """
+        track = self.next_track()
+        return Path(track.path) if track else None
+
     def get_previous(self) -> Optional[Path]:
         """
         Get the previous track from history.
@@ -82,82 +362,390 @@ class PlaybackQueue:
         Returns:
             Path to previous track or None if no history
         """
-        if not self.played_stack:
-            logger.warning("No tracks in play history")
-            return None
+        track = self.previous_track()
+        return Path(track.path) if track else None
 
-        try:
-            # Different cases for history navigation
-            if len(self.played_stack) <= 1:
-                # Only one track played
-                if self.ready_queue.qsize() == 0:
-                    # No queue, replay current
-                    path = Path(self.played_stack[-1])
-                    logger.debug(f"Replaying current track: {path.name}")
-                else:
-                    # Swap with last in queue
-                    last_song = self.ready_queue.queue[-1]
-                    self.ready_queue.queue[-1] = self.played_stack[-1]
-                    self.played_stack[-1] = last_song
-                    path = Path(last_song)
-                    logger.debug(f"Swapped to previous: {path.name}")
-            else:
-                # Multiple tracks played, go back one
-                current = self.played_stack.pop()
-                path = Path(self.played_stack[-1])
-                self.ready_queue.queue.insert(0, current)
-                logger.debug(f"Previous track: {path.name}")
-
-            if not path.exists():
-                logger.error(f"Track file not found: {path}")
-                return None
+    def peek_upcoming(self, count: int) -> List[Track]:
+        """
+        List the tracks next_track would return, without moving the cursor.
 
-            return path
+        Follows the same wrap-around and skips unavailable tracks.
 
-        except Exception as e:
-            logger.error(f"Error getting previous track: {e}")
-            return None
+        Args:
+            count: Maximum number of tracks to return
+
+        Returns:
+            Upcoming tracks in play order
+        """
+        with self._lock:
+            session = self._active
+            size = len(session.tracks)
+            upcoming = []
+            for offset in range(1, size + 1):
+                if len(upcoming) >= count:
+                    break
+                track = session.tracks[(session.cursor + offset) % size]
+                if track.available:
+                    upcoming.append(track)
+
+        return upcoming
+
+    def get_track(self, track_id: str) -> Optional[Track]:
+        """
+        Look up a track by its ID in any session.
+
+        Args:
+            track_id: Track identifier
+
+        Returns:
+            The track, or None if it is not in any playlist
+        """
+        with self._lock:
+            track = self._active.by_id.get(track_id)
+            if track is not None:
+                return track
+
+            for session in self._sessions.values():
+                track = session.by_id.get(track_id)
+                if track is not None:
+                    return track
+
+        return None
+
+    def set_available(self, file_path: str, available: bool) -> bool:
+        """
+        Update the availability index for a file in every session.
+
+        Args:
+            file_path: Path of the audio file
+            available: Whether the file exists on disk
+
+        Returns:
+            True if the file belongs to a track in any playlist
+        """
+        found = False
+        with self._lock:
+            for session in self._sessions.values():
+                track = session.by_path.get(file_path)
+                if track is not None:
+                    session.set_available(track, available)
+                    found = True
+
+        return found
+
+    def set_etag(self, file_path: str, etag: str) -> None:
+        """
+        Store the content hash of a file in every track that uses it.
+
+        Args:
+            file_path: Path of the audio file
+            etag: Content hash computed from the file
+        """
+        with self._lock:
+            for session in self._sessions.values():
+                track = session.by_path.get(file_path)
+                if track is not None:
+                    track.etag = etag
+
+    def set_duration(self, file_path: str, duration: float) -> None:
+        """
+        Store the measured length of a file in every track that uses it.
+
+        Args:
+            file_path: Path of the audio file
+            duration: Length in seconds
+        """
+        with self._lock:
+            for session in self._sessions.values():
+                track = session.by_path.get(file_path)
+                if track is not None:
+                    track.duration = duration
+
+    def set_size(self, file_path: str, size: int) -> None:
+        """
+        Store the size of a complete file in every track that uses it.
+
+        Args:
+            file_path: Path of the audio file
+            size: Size in bytes
+        """
+        with self._lock:
+            for session in self._sessions.values():
+                track = session.by_path.get(file_path)
+                if track is not None:
+                    session.set_size(track, size)
+
+    def replace_track(self, old_path: str, new_path: str) -> bool:
+        """
+        Point a track at another file, keeping its ID and position.
+
+        Used to transparently upgrade fast-start tracks to full quality.
+
+        Args:
+            old_path: Path currently in the playlist
+            new_path: Path to use from now on
+
+        Returns:
+            True if the old track was found and replaced
+        """
+        replaced = False
+        with self._lock:
+            for session in self._sessions.values():
+                track = session.by_path.pop(old_path, None)
+                if track is None:
+                    continue
+
+                track.path = new_path
+                track.etag = None
+                session.set_size(track, 0)
+                session.by_path[new_path] = track
+                session.set_available(track, True)
+                replaced = True
+
+            if replaced:
+                self._record("replace", old=old_path, new=new_path)
+
+        return replaced
+
+    def remove_track(self, file_path: str) -> bool:
+        """
+        Remove a file's track from every playlist.
+
+        Used when a published file turns out to be broken. The cursor stays
+        on the same track, or just before the removed one.
+
+        Args:
+            file_path: Path of the audio file
+
+        Returns:
+            True if the file belonged to a track in any playlist
+        """
+        removed = False
+        with self._lock:
+            for session in self._sessions.values():
+                track = session.by_path.get(file_path)
+                if track is None:
+                    continue
+
+                index = session.tracks.index(track)
+                cursor = session.cursor - int(index <= session.cursor)
+                self._truncate(session, index, index + 1, cursor=cursor)
+                removed = True
+
+        return removed
 
     def clear_queue(self) -> None:
-        """Clear the playback queue."""
-        while not self.ready_queue.empty():
-            try:
-                self.ready_queue.get_nowait()
-            except queue.Empty:
-                break
+        """Clear the playback queue of the active session."""
+        with self._lock:
+            session = self._active
+            self._truncate(session, session.cursor + 1, len(session.tracks))
         logger.info("Playback queue cleared")
 
     def clear_history(self) -> None:
-        """Clear the play history."""
-        self.played_stack.clear()
+        """Clear the play history of the active session."""
+        with self._lock:
+            session = self._active
+            self._truncate(session, 0, session.cursor + 1, cursor=-1)
         logger.info("Play history cleared")
 
     def clear_all(self) -> None:
-        """Clear both queue and history."""
-        self.clear_queue()
-        self.clear_history()
+        """Clear both queue and history of the active session."""
+        with self._lock:
+            session = self._active
+            self._truncate(session, 0, len(session.tracks), cursor=-1)
         logger.info("Queue and history cleared")
 
+    def get_buffered_seconds(self, session: Optional[str] = None) -> float:
+        """
+        Get the total playtime of tracks ready to play.
+
+        Only tracks never played count, so going back or recycling played
+        tracks does not look like buffer. Tracks of unknown length count as
+        ESTIMATED_TRACK_DURATION; unavailable tracks are not counted.
+
+        Args:
+            session: Session key (defaults to the active session)
+
+        Returns:
+            Seconds of ready playtime ahead of the listener
+        """
+        with self._lock:
+            target = self._get_session(session)
+            if target is None:
+                return 0.0
+
+            return sum(
+                track.duration or ESTIMATED_TRACK_DURATION
+                for track in target.unplayed()
+                if track.available
+            )
+
     def get_queue_size(self) -> int:
         """Get the number of tracks in queue."""
-        return self.ready_queue.qsize()
+        with self._lock:
+            return len(self._active.upcoming())
 
     def get_history_size(self) -> int:
         """Get the number of tracks in history."""
-        return len(self.played_stack)
+        with self._lock:
+            return self._active.cursor + 1
 
     def has_next(self) -> bool:
         """Check if there are tracks available to play next."""
-        return self.ready_queue.qsize() > 0 or len(self.played_stack) > 0
+        return self._active.available_count > 0
 
     def has_previous(self) -> bool:
         """Check if there are previous tracks in history."""
-        return len(self.played_stack) > 0
+        return self._active.cursor >= 0
 
+    def attach_journal(self, journal) -> None:
+        """
+        Record every queue change to a journal from now on.
 
-# Export for backward compatibility
-ready_queue = _ready_queue
-played_stack = _played_stack
+        Args:
+            journal: QueueJournal receiving the changes
+        """
+        self._journal = journal
+
+    @contextmanager
+    def frozen(self) -> Iterator[None]:
+        """Hold the queue lock, blocking all changes, for a consistent snapshot."""
+        with self._lock:
+            yield
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Capture all sessions in journal form.
+
+        Returns:
+            Active session key and sessions, least recently used first
+        """
+        with self._lock:
+            return {
+                "active": self._active.key,
+                "sessions": {
+                    key: {
+                        "tracks": [track.to_dict() for track in session.tracks],
+                        "cursor": session.cursor,
+                        "played": session.played,
+                    }
+                    for key, session in self._sessions.items()
+                },
+            }
+
+    def restore(self, state: Dict[str, Any]) -> int:
+        """
+        Rebuild sessions from a journal state.
+
+        Tracks keep their IDs and positions; tracks whose file is no longer
+        cached are kept but marked unavailable. File sizes are read once
+        here for the session disk budget.
+
+        Args:
+            state: State replayed from the journal
+
+        Returns:
+            Number of tracks whose file is still available
+        """
+        sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        for key, data in state.get("sessions", {}).items():
+            session = _Session(key)
+            for item in data.get("tracks", []):
+                try:
+                    size = Path(item["path"]).stat().st_size
+                except OSError:
+                    size = None
+                session.add(
+                    Track(
+                        path=item["path"],
+                        duration=item.get("duration"),
+                        id=item["id"],
+                        available=size is not None,
+                        size=size or 0,
+                    )
+                )
+            session.cursor = min(data.get("cursor", -1), len(session.tracks) - 1)
+            session.played = min(
+                max(data.get("played", -1), session.cursor), len(session.tracks) - 1
+            )
+            sessions[key] = session
+
+        if not sessions:
+            return 0
+
+        with self._lock:
+            self._sessions = sessions
+            active = state.get("active")
+            self._active = sessions.get(active) or next(reversed(sessions.values()))
+
+        return sum(session.available_count for session in sessions.values())
+
+    def _record(self, op: str, **fields: Any) -> None:
+        """Record a change to the attached journal (lock must be held)."""
+        if self._journal is not None:
+            self._journal.record(op, **fields)
+
+    def _record_cursor(self, session: _Session) -> None:
+        """Record a cursor move (lock must be held)."""
+        self._record(
+            "cursor", session=session.key, cursor=session.cursor, played=session.played
+        )
+
+    def _truncate(
+        self, session: _Session, start: int, end: int, cursor: Optional[int] = None
+    ) -> None:
+        """Remove tracks[start:end] from a session (lock must be held)."""
+        session.truncate(start, end)
+        if cursor is not None:
+            session.cursor = cursor
+        self._record(
+            "truncate",
+            session=session.key,
+            start=start,
+            end=end,
+            cursor=session.cursor,
+            played=session.played,
+        )
+
+    def _get_session(self, key: Optional[str]) -> Optional[_Session]:
+        """Resolve a session key, None meaning the active session."""
+        return self._active if key is None else self._sessions.get(key)
+
+    def _enforce_budget(self) -> None:
+        """
+        Evict least-recently-used inactive sessions over budget.
+
+        Lock must be held. Disk usage comes from the sizes kept per
+        session, so no files are touched unless a session is evicted; its
+        files are deleted unless another session still references them.
+        """
+        budget = SESSION_DISK_BUDGET_MB * 1024 * 1024
+        usage = sum(s.disk_bytes for s in self._sessions.values())
+
+        for key in list(self._sessions):
+            over_count = len(self._sessions) > SESSION_MAX_COUNT
+            over_disk = usage > budget
+            if not (over_count or over_disk):
+                break
+            if key == self._active.key:
+                continue
+
+            evicted = self._sessions.pop(key)
+            usage -= evicted.disk_bytes
+            self._record("evict", session=key)
+            self._delete_files(evicted)
+            logger.info(f"Evicted playlist session: {key}")
+
+    def _delete_files(self, evicted: _Session) -> None:
+        """Delete an evicted session's files not used by other sessions."""
+        for track in evicted.tracks:
+            if any(track.path in s.by_path for s in self._sessions.values()):
+                continue
+            for path in [Path(track.path), *get_derived_files(track.path)]:
+                try:
+                    path.unlink(missing_ok=True)
+                except OSError as e:
+                    logger.warning(f"Error deleting {path}: {e}")
 
 
 def clean_all():
@@ -0,0 +1,221 @@
+"""
+Rate limiter - Request and token budgets for LLM calls.
+Queues calls that would exceed a model's per-minute limits and backs off on 429s.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from groq import RateLimitError
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableConfig
+from loguru import logger
+
+from config.settings import (
+    LLM_OUTPUT_TOKENS_ESTIMATE,
+    LLM_RATE_LIMIT_BACKOFF,
+    LLM_RATE_LIMIT_DEFAULT,
+    LLM_RATE_LIMIT_MAX_RETRIES,
+    LLM_RATE_LIMITS,
+)
+
+CHARS_PER_TOKEN = 4  # rough prompt size estimate before the call
+
+
+class TokenBucket:
+    """
+    Budget refilled continuously up to a per-minute capacity.
+
+    Reservations are taken immediately, even past zero, and the caller is
+    told how long to wait until the budget covers it. Callers are therefore
+    served in reservation order and none of them is starved.
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Capacity, refilled evenly over one minute
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take an amount from the bucket (lock must be held by the caller).
+
+        Args:
+            amount: Requests or tokens to take
+
+        Returns:
+            Seconds to wait before the reservation is covered
+        """
+        self._refill()
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Give back (positive) or take more (negative) after the fact."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the server reported a rate limit."""
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """
+    Shared rate limiter for every LLM call.
+
+    Each model gets a request bucket and a token bucket sized from
+    LLM_RATE_LIMITS. A call reserves one request and its estimated tokens
+    (prompt size plus LLM_OUTPUT_TOKENS_ESTIMATE) and sleeps until both are
+    covered; the estimate is corrected with the real usage afterwards. A
+    RateLimitError pauses the whole model for its retry-after interval and
+    the call is retried instead of being dropped.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(RateLimiter, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the rate limiter."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self._buckets: Dict[str, Dict[str, TokenBucket]] = {}
+        self._paused_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, model: str, tokens: int) -> None:
+        """
+        Block until a call of the given size fits the model's limits.
+
+        Args:
+            model: Model name
+            tokens: Estimated tokens of the call
+        """
+        with self._lock:
+            buckets = self._get_buckets(model)
+            wait = max(
+                buckets["requests"].reserve(1),
+                buckets["tokens"].reserve(tokens),
+                self._paused_until.get(model, 0.0) - time.monotonic(),
+            )
+
+        if wait > 0:
+            logger.debug(f"Rate limit: waiting {wait:.1f}s for {model}")
+            time.sleep(wait)
+
+    def settle(self, model: str, estimated: int, used: Optional[int]) -> None:
+        """
+        Correct a reservation with the tokens a call actually used.
+
+        Args:
+            model: Model name
+            estimated: Tokens reserved by acquire()
+            used: Tokens reported by the API (None if unknown)
+        """
+        if used is None:
+            return
+        with self._lock:
+            self._get_buckets(model)["tokens"].adjust(estimated - used)
+
+    def pause(self, model: str, seconds: float) -> None:
+        """
+        Stop all calls to a model for a while.
+
+        Args:
+            model: Model name
+            seconds: Pause length (from the retry-after header when present)
+        """
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._paused_until[model] = max(self._paused_until.get(model, 0.0), until)
+            for bucket in self._get_buckets(model).values():
+                bucket.drain()
+        logger.warning(f"Rate limited by the API: pausing {model} for {seconds:.1f}s")
+
+    def invoke(
+        self,
+        model: str,
+        prompt: ChatPromptTemplate,
+        llm: Runnable,
+        inputs: Dict[str, Any],
+        config: Optional[RunnableConfig] = None,
+    ) -> Any:
+        """
+        Run a prompt through a structured-output model under the limits.
+
+        Args:
+            model: Model name
+            prompt: Prompt template
+            llm: Model with structured output and include_raw=True
+            inputs: Prompt variables
+            config: Runnable config of the caller
+
+        Returns:
+            The parsed structured output
+
+        Raises:
+            RateLimitError: If still rate limited after the last retry
+        """
+        messages = prompt.invoke(inputs)
+        estimated = (
+            sum(len(str(m.content)) for m in messages.to_messages()) // CHARS_PER_TOKEN
+            + LLM_OUTPUT_TOKENS_ESTIMATE
+        )
+
+        for attempt in range(LLM_RATE_LIMIT_MAX_RETRIES + 1):
+            self.acquire(model, estimated)
+            try:
+                result = llm.invoke(messages, config)
+                break
+            except RateLimitError as e:
+                if attempt == LLM_RATE_LIMIT_MAX_RETRIES:
+                    raise
+                self.pause(model, _retry_after(e, attempt))
+
+        usage = getattr(result["raw"], "usage_metadata", None) or {}
+        self.settle(model, estimated, usage.get("total_tokens"))
+
+        if result["parsing_error"] is not None:
+            raise result["parsing_error"]
+        return result["parsed"]
+
+    def _get_buckets(self, model: str) -> Dict[str, TokenBucket]:
+        """Get (or create) a model's buckets (lock must be held)."""
+        buckets = self._buckets.get(model)
+        if buckets is None:
+            limits = LLM_RATE_LIMITS.get(model, LLM_RATE_LIMIT_DEFAULT)
+            buckets = {
+                "requests": TokenBucket(limits["rpm"]),
+                "tokens": TokenBucket(limits["tpm"]),
+            }
+            self._buckets[model] = buckets
+        return buckets
+
+
+def _retry_after(error: RateLimitError, attempt: int) -> float:
+    """Seconds to wait after a 429: the retry-after header, else backoff."""
+    try:
+        return float(error.response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return LLM_RATE_LIMIT_BACKOFF * 2**attempt
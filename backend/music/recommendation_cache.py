@@ -0,0 +1,257 @@
+"""
+Recommendation cache - Persistent LLM playlists per champion.
+Avoids regenerating a playlist for champions played recently.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from loguru import logger
+
+from config.settings import (
+    RECOMMENDATION_CACHE_MAX_ENTRIES,
+    RECOMMENDATION_CACHE_PARTIAL_TTL,
+    RECOMMENDATION_CACHE_TTL,
+    RECOMMENDATION_REFRESH_AFTER_USES,
+    STATE_DIR,
+)
+
+CACHE_FILE_NAME = "recommendations.json"
+
+
+def make_cache_key(champion: str, model: str, prompt_version: str) -> str:
+    """
+    Build the cache key for a champion's playlist.
+
+    Args:
+        champion: Champion name
+        model: LLM model that generated the playlist
+        prompt_version: Version of the prompts used
+
+    Returns:
+        Cache key
+    """
+    return f"{champion}|{model}|{prompt_version}"
+
+
+class RecommendationCache:
+    """
+    Persistent cache of generated playlists.
+
+    Entries are keyed by (champion, model, prompt version), so switching
+    model or editing the prompts never serves stale results. Entries expire
+    after RECOMMENDATION_CACHE_TTL (RECOMMENDATION_CACHE_PARTIAL_TTL for
+    playlists stored short of their target) and the least recently used
+    ones are evicted beyond RECOMMENDATION_CACHE_MAX_ENTRIES. Each hit
+    returns a reshuffled copy; after RECOMMENDATION_REFRESH_AFTER_USES hits
+    an entry is flagged for a partial regeneration.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(RecommendationCache, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the cache and load it from disk."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self.path = Path(STATE_DIR) / CACHE_FILE_NAME
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._refreshing: Set[str] = set()
+        self._lock = threading.RLock()
+        self._load()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """
+        Get a cached playlist in a fresh random order.
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            Shuffled search queries, or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            if self._expired(entry):
+                del self._entries[key]
+                self._save()
+                logger.debug(f"Recommendation cache expired: {key}")
+                return None
+
+            # Persisted so refresh and LRU order survive restarts
+            entry["uses"] += 1
+            entry["last_used"] = time.time()
+            queries = list(entry["queries"])
+            self._save()
+
+        random.shuffle(queries)
+        return queries
+
+    def peek(self, key: str) -> Optional[List[str]]:
+        """
+        Get a cached playlist without counting it as a use.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Shuffled search queries, or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry):
+                return None
+            queries = list(entry["queries"])
+
+        random.shuffle(queries)
+        return queries
+
+    def champions(self, model: str, prompt_version: str) -> List[str]:
+        """
+        List champions with a live playlist for a model and prompt version.
+
+        Args:
+            model: LLM model name
+            prompt_version: Version of the prompts
+
+        Returns:
+            Champion names
+        """
+        suffix = make_cache_key("", model, prompt_version)
+        with self._lock:
+            return [
+                key[: -len(suffix)]
+                for key, entry in self._entries.items()
+                if key.endswith(suffix) and not self._expired(entry)
+            ]
+
+    def claim_refresh(self, key: str) -> bool:
+        """
+        Check whether an entry is due for a partial regeneration.
+
+        Returns True at most once until refresh() is called for the key, so
+        only one caller regenerates it.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            True if the caller should regenerate part of the entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or key in self._refreshing:
+                return False
+            if entry["uses"] < RECOMMENDATION_REFRESH_AFTER_USES:
+                return False
+
+            self._refreshing.add(key)
+            return True
+
+    def put(self, key: str, queries: List[str], partial: bool = False) -> None:
+        """
+        Store a freshly generated playlist.
+
+        Args:
+            key: Cache key
+            queries: Search queries
+            partial: Whether the playlist fell short of its target (e.g.
+                some LLM requests failed); such entries expire sooner
+        """
+        now = time.time()
+        ttl = RECOMMENDATION_CACHE_PARTIAL_TTL if partial else RECOMMENDATION_CACHE_TTL
+        with self._lock:
+            self._entries[key] = {
+                "queries": list(queries),
+                "created": now,
+                "last_used": now,
+                "uses": 0,
+                "ttl": ttl,
+            }
+            self._evict()
+            self._save()
+
+    def refresh(self, key: str, new_queries: List[str]) -> None:
+        """
+        Replace a random part of a cached playlist with new queries.
+
+        The entry keeps its size, its TTL restarts and its use count resets.
+        Releases the claim taken by claim_refresh(); with no new queries the
+        entry is left as is and will be claimed again on a later hit.
+
+        Args:
+            key: Cache key
+            new_queries: Newly generated queries to blend in
+        """
+        with self._lock:
+            self._refreshing.discard(key)
+            entry = self._entries.get(key)
+            if entry is None or not new_queries:
+                return
+
+            fresh = [q for q in dict.fromkeys(new_queries) if q not in entry["queries"]]
+            kept = list(entry["queries"])
+            random.shuffle(kept)
+            kept = kept[: max(0, len(kept) - len(fresh))]
+
+            entry["queries"] = kept + fresh
+            entry["created"] = time.time()
+            entry["uses"] = 0
+            self._save()
+
+        logger.info(f"Refreshed {len(fresh)} cached recommendations for {key}")
+
+    @staticmethod
+    def _expired(entry: Dict[str, Any]) -> bool:
+        """Check whether an entry is older than its TTL."""
+        ttl = entry.get("ttl", RECOMMENDATION_CACHE_TTL)
+        return time.time() - entry["created"] > ttl
+
+    def _evict(self) -> None:
+        """Drop least recently used entries over the size limit (lock held)."""
+        excess = len(self._entries) - RECOMMENDATION_CACHE_MAX_ENTRIES
+        if excess <= 0:
+            return
+
+        by_age = sorted(self._entries, key=lambda k: self._entries[k]["last_used"])
+        for key in by_age[:excess]:
+            del self._entries[key]
+
+    def _load(self) -> None:
+        """Load entries from disk, ignoring a missing or corrupt file."""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+            logger.debug(f"Loaded {len(self._entries)} cached recommendations")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable recommendation cache: {e}")
+            self._entries = {}
+
+    def _save(self) -> None:
+        """Write entries to disk atomically (lock held)."""
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Error saving recommendation cache: {e}")
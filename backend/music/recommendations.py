@@ -3,14 +3,30 @@ Recommendation engine - Generates music recommendations for champions.
 Combines style inference with music discovery to create personalized playlists.
 """
 
-import random
-from collections import Counter
-from typing import List
+import threading
+from typing import Iterator, List, Optional, Tuple
 
 from loguru import logger
 
+from config.settings import (
+    LOCAL_FIRST_TRACKS,
+    LOCAL_RECOMMENDER_ENABLED,
+    NEIGHBOUR_BLEND_TRACKS,
+    NEIGHBOUR_SIMILARITY_THRESHOLD,
+    RECOMMENDATION_CACHE_ENABLED,
+    RECOMMENDATION_REFRESH_FRACTION,
+)
 from schemas import Champion
-from .dj_lol import gerar_playlist
+from .dj_lol import (
+    TEMAS_POR_CAMPEAO,
+    gerar_playlist,
+    gerar_playlist_em_partes,
+    get_model_name,
+    get_prompt_version,
+)
+from .champion_index import ChampionIndex
+from .local_recommender import LocalRecommender
+from .recommendation_cache import RecommendationCache, make_cache_key
 
 
 class RecommendationEngine:
@@ -18,8 +34,19 @@ class RecommendationEngine:
     Engine for generating music recommendations.
 
     Uses champion characteristics to discover appropriate music tracks.
+    Generated playlists are cached per champion, model and prompt version.
+    While the LLM is working, the first tracks are borrowed from the cached
+    playlist of a similar champion, or else drawn from the offline
+    LocalRecommender, which also supplies the whole playlist when the LLM
+    is unavailable.
     """
 
+    def __init__(self):
+        """Initialize the recommendation engine."""
+        self.cache = RecommendationCache()
+        self.local = LocalRecommender()
+        self.index = ChampionIndex()
+
     def get_recommendations(
         self, champion: Champion, max_tracks: int = 100
     ) -> List[str]:
@@ -33,70 +60,144 @@ class RecommendationEngine:
         Returns:
             List of track strings in format "Track Name - Artist Name"
         """
-        try:
-            playlist = gerar_playlist(champion.name, total_alvo=max_tracks)
-            return playlist
+        return [
+            track
+            for batch in self.stream_recommendations(champion, max_tracks)
+            for track in batch
+        ]
 
-        except Exception as e:
-            logger.error(f"Error generating recommendations for {champion.name}: {e}")
-            return []
+    def stream_recommendations(
+        self, champion: Champion, max_tracks: int = 100
+    ) -> Iterator[List[str]]:
+        """
+        Get music recommendations for a champion in batches.
 
-    def _get_tracks_by_style(self, style: str) -> List[str]:
-        """Get tracks for a specific music style/tag."""
-        try:
-            tracks = self.lastfm.get_tracks_by_tag(style)
-            return tracks
+        A cached playlist is yielded as a single batch. Otherwise tracks
+        from a similar champion's cached playlist (or a few catalog tracks)
+        come first, then each theme's tracks as soon as the LLM returns
+        them, so downloads start while the other themes are still
+        generating. If the LLM returns nothing, the rest of the
+        playlist comes from the local catalog. If the caller stops iterating
+        early, the tracks generated so far are cached as a partial playlist.
 
-        except Exception as e:
-            logger.error(f"Error fetching tracks for style '{style}': {e}")
-            return []
+        Args:
+            champion: Champion to generate recommendations for
+            max_tracks: Maximum number of tracks to return
 
-    def _get_similar_tracks(self, champion: Champion) -> List[str]:
-        """Get similar tracks based on champion's associated music."""
+        Yields:
+            Lists of track strings in format "Track Name - Artist Name"
+        """
+        self.index.add(champion)
+        scope = self._cache_scope()
+        key = make_cache_key(champion.name, *scope) if scope else None
+        if key:
+            cached = self.cache.get(key)
+            if cached:
+                logger.info(f"Using cached recommendations for {champion.name}")
+                if self.cache.claim_refresh(key):
+                    self._refresh_in_background(champion, key, len(cached))
+                yield cached[:max_tracks]
+                return
+
+        sent: List[str] = []
+        first = self._neighbour_tracks(champion, scope, max_tracks) if scope else []
+        if not first and LOCAL_RECOMMENDER_ENABLED:
+            first = self.local.recommend(champion, min(LOCAL_FIRST_TRACKS, max_tracks))
+        if first:
+            sent.extend(first)
+            yield first
+
+        # The champion's own LLM playlist, cached without borrowed tracks
+        generated: List[str] = []
         try:
-            champ_config = self.champion_styles.get(champion.name, {})
-            mbid = champ_config.get("musica", {}).get("mbid")
-
-            if not mbid:
-                return []
-
-            similar_tracks = self.lastfm.get_similar_tracks(mbid)
-            return similar_tracks
+            for batch in gerar_playlist_em_partes(champion.name, total_alvo=max_tracks):
+                known = {track.lower() for track in generated}
+                batch = [q for q in batch if q.lower() not in known]
+                generated.extend(batch[: max_tracks - len(generated)])
+
+                seen = {track.lower() for track in sent}
+                batch = [q for q in batch if q.lower() not in seen]
+                batch = batch[: max_tracks - len(sent)]
+                if batch:
+                    sent.extend(batch)
+                    yield batch
 
         except Exception as e:
-            logger.error(f"Error fetching similar tracks for {champion.name}: {e}")
-            return []
-
-    def _generate_weighted_playlist(
-        self, track_counter: Counter, max_tracks: int
-    ) -> List[str]:
+            logger.error(f"Error generating recommendations for {champion.name}: {e}")
+        except GeneratorExit:
+            # The consumer stopped early: keep the tracks generated so far
+            if generated and key:
+                self.cache.put(key, generated, partial=True)
+            raise
+
+        if generated:
+            if key:
+                # The LLM is asked for a whole number of tracks per theme
+                target = max_tracks - max_tracks % TEMAS_POR_CAMPEAO
+                partial = len(generated) < target
+                self.cache.put(key, generated, partial=partial)
+        elif LOCAL_RECOMMENDER_ENABLED:
+            logger.warning(f"LLM unavailable, using local catalog for {champion.name}")
+            fallback = self.local.recommend(
+                champion, max_tracks - len(sent), exclude=set(sent)
+            )
+            if fallback:
+                yield fallback
+
+    def has_cached(self, champion: Champion) -> bool:
         """
-        Generate a weighted random playlist from track counter.
+        Check whether a champion's playlist can be served without the LLM.
 
         Args:
-            track_counter: Counter with track names and weights
-            max_tracks: Maximum number of tracks
+            champion: Champion to check
 
         Returns:
-            List of track names
+            True if a live cached playlist exists for the current model
         """
-        if not track_counter:
-            logger.warning("No tracks available for playlist generation")
-            return []
+        scope = self._cache_scope()
+        return bool(scope) and champion.name in self.cache.champions(*scope)
 
-        # Get tracks and weights
-        tracks = list(track_counter.keys())
-        weights = list(track_counter.values())
-
-        # Limit to available tracks or max_tracks
-        n_tracks = min(len(tracks), max_tracks)
-
-        # Generate weighted random selection
+    def _cache_scope(self) -> Optional[Tuple[str, str]]:
+        """Get the (model, prompt version) of cache keys, or None if off."""
+        if not RECOMMENDATION_CACHE_ENABLED:
+            return None
         try:
-            playlist = random.choices(tracks, weights=weights, k=n_tracks)
-            return playlist
+            return get_model_name(), get_prompt_version()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Recommendation cache unavailable: {e}")
+            return None
 
-        except Exception as e:
-            logger.error(f"Error generating weighted playlist: {e}")
-            # Fallback to simple random selection
-            return random.sample(tracks, min(n_tracks, len(tracks)))
+    def _neighbour_tracks(
+        self, champion: Champion, scope: Tuple[str, str], max_tracks: int
+    ) -> List[str]:
+        """Borrow tracks from the most similar champion with a cached playlist."""
+        neighbour = self.index.nearest(champion, self.cache.champions(*scope))
+        if neighbour is None or neighbour[1] < NEIGHBOUR_SIMILARITY_THRESHOLD:
+            return []
+
+        name, similarity = neighbour
+        tracks = self.cache.peek(make_cache_key(name, *scope)) or []
+        tracks = tracks[: min(NEIGHBOUR_BLEND_TRACKS, max_tracks)]
+        if tracks:
+            logger.info(
+                f"Starting {champion.name} with {len(tracks)} tracks from "
+                f"{name} (similarity {similarity:.2f})"
+            )
+        return tracks
+
+    def _refresh_in_background(self, champion: Champion, key: str, size: int) -> None:
+        """Regenerate part of a cached playlist without delaying playback."""
+        count = max(1, round(size * RECOMMENDATION_REFRESH_FRACTION))
+
+        def refresh():
+            queries = []
+            try:
+                queries = gerar_playlist(champion.name, total_alvo=count)
+            except Exception as e:
+                logger.warning(f"Could not refresh recommendations for {key}: {e}")
+            finally:
+                self.cache.refresh(key, queries[:count])
+
+        threading.Thread(
+            target=refresh, name="RecommendationRefresh", daemon=True
+        ).start()
@@ -0,0 +1,121 @@
+"""
+Audio renditions - Lower-bitrate copies of tracks for clients on slow links.
+Transcoded lazily on first request and cached next to the original file.
+"""
+
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from loguru import logger
+
+from config.settings import RENDITION_BITRATES, RENDITIONS_ENABLED
+from music.download import FFMPEG_PATH
+from music.formats import QUALITY_ORIGINAL, get_rendition_path
+from music.governor import ResourceGovernor
+
+
+class RenditionCache:
+    """
+    Cache of lower-bitrate AAC renditions.
+
+    The first request for a rendition transcodes the original with FFmpeg
+    (under the resource governor, like downloads); concurrent requests for
+    the same rendition wait for that transcode instead of starting their
+    own. Renditions are written atomically and deleted with their track.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(RenditionCache, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the rendition cache."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self.governor = ResourceGovernor()
+        self.ffmpeg_path = str(FFMPEG_PATH)
+        self._pending: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_available(quality: str) -> bool:
+        """Check whether a quality name can be served."""
+        if quality == QUALITY_ORIGINAL:
+            return True
+        return RENDITIONS_ENABLED and quality in RENDITION_BITRATES
+
+    def get(self, path: Path, quality: str) -> Optional[Path]:
+        """
+        Get the file for a quality, transcoding it on first use. Blocking.
+
+        Args:
+            path: Path of the original audio file
+            quality: QUALITY_ORIGINAL or a name from RENDITION_BITRATES
+
+        Returns:
+            Path of the file to serve, or None if transcoding failed
+        """
+        if quality == QUALITY_ORIGINAL:
+            return path
+
+        target = get_rendition_path(path, quality)
+        if target.exists():
+            return target
+
+        with self._lock:
+            lock = self._pending.setdefault(str(target), threading.Lock())
+
+        with lock:
+            if not target.exists():
+                self._transcode(path, target, RENDITION_BITRATES[quality])
+
+        with self._lock:
+            self._pending.pop(str(target), None)
+
+        return target if target.exists() else None
+
+    def _transcode(self, source: Path, target: Path, bitrate: str) -> None:
+        """Encode source to AAC at bitrate, replacing target atomically."""
+        tmp_path = target.with_name(target.name + ".tmp")
+        try:
+            subprocess.run(
+                self.governor.wrap_command(
+                    [
+                        self.ffmpeg_path,
+                        "-v",
+                        "error",
+                        "-i",
+                        str(source),
+                        "-vn",
+                        "-c:a",
+                        "aac",
+                        "-b:a",
+                        bitrate,
+                        *self.governor.ffmpeg_args(),
+                        "-movflags",
+                        "+faststart",
+                        "-f",
+                        "mp4",
+                        "-y",
+                        str(tmp_path),
+                    ]
+                ),
+                check=True,
+                capture_output=True,
+                **self.governor.process_kwargs(),
+            )
+            os.replace(tmp_path, target)
+            logger.info(f"Rendition created: {target.name} ({bitrate})")
+
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Could not create rendition {target.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,277 @@
+"""
+Download scheduler - Just-in-time downloads driven by playback buffer depth.
+Keeps a target amount of ready playtime ahead of the listener and leaves the
+rest of the playlist as pending queries until the buffer drains.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from loguru import logger
+
+from config.settings import (
+    ESTIMATED_TRACK_DURATION,
+    FAST_START_ENABLED,
+    FAST_START_TRACK_COUNT,
+    PLAYBACK_BUFFER_TARGET,
+)
+from music.download import DownloadRequest, MusicDownloader
+from music.queue import DEFAULT_SESSION, PlaybackQueue
+
+
+class DownloadScheduler:
+    """
+    Just-in-time download scheduler.
+
+    Only queues enough downloads to keep PLAYBACK_BUFFER_TARGET seconds of
+    music ready (counting downloads still in flight), and tops the buffer up
+    whenever a download finishes or a track is consumed. The first tracks of
+    each new playlist are downloaded in fast-start mode.
+
+    Pending queries are kept per playlist session, so switching back to a
+    champion resumes its remaining playlist where it stopped. With a
+    journal attached, queries stay journaled until their download finishes,
+    so a restart re-queues whatever was pending or in flight.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(DownloadScheduler, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the download scheduler."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self.downloader = MusicDownloader()
+        self.queue = PlaybackQueue()
+        self.target_buffer = PLAYBACK_BUFFER_TARGET
+        self._session = DEFAULT_SESSION
+        self._pending: Dict[str, Deque[str]] = {}
+        self._in_flight: Dict[str, List[str]] = {}
+        self._upgrades: List[DownloadRequest] = []
+        self._fast_start_remaining = 0
+        self._lock = threading.RLock()
+        self._journal = None
+
+        self.downloader.add_done_callback(self._on_download_done)
+
+    def set_playlist(self, queries: List[str], session: Optional[str] = None) -> None:
+        """
+        Replace a session's pending playlist and start filling its buffer.
+
+        The session becomes the active one.
+
+        Args:
+            queries: Search queries in play order
+            session: Playlist session key (defaults to the active session)
+        """
+        with self._lock:
+            self._switch_to(session or self._session)
+            self._pending[self._session] = deque(queries)
+            # Downloads of the replaced playlist no longer count as buffer
+            self._in_flight.pop(self._session, None)
+            self._fast_start_remaining = (
+                FAST_START_TRACK_COUNT if FAST_START_ENABLED else 0
+            )
+            self._record("pending", session=self._session, queries=list(queries))
+
+        logger.info(
+            f"Scheduled {len(queries)} tracks "
+            f"(buffer target: {self.target_buffer / 60:.0f} min)"
+        )
+        self.refill()
+
+    def extend_playlist(self, queries: List[str], session: str) -> None:
+        """
+        Append queries to a session's pending playlist.
+
+        Used while a playlist is still being generated; downloads start
+        right away if the session is active and its buffer is short.
+
+        Args:
+            queries: Search queries to append
+            session: Playlist session key
+        """
+        with self._lock:
+            if session != self._session and not self.queue.has_session(session):
+                return
+            self._pending.setdefault(session, deque()).extend(queries)
+            self._record("extend", session=session, queries=list(queries))
+
+        logger.debug(f"Appended {len(queries)} tracks to session {session}")
+        self.refill()
+
+    def prepare_session(self, queries: List[str], session: str, count: int) -> None:
+        """
+        Download the first tracks of an inactive session's playlist.
+
+        The rest stays pending until the session is activated, which then
+        resumes it like any other warm session.
+
+        Args:
+            queries: Search queries in play order
+            session: Inactive playlist session key
+            count: Number of tracks to download now
+        """
+        with self._lock:
+            if session == self._session or not self.queue.has_session(session):
+                return
+
+            self._pending[session] = deque(queries[count:])
+            self._in_flight[session] = list(queries[:count])
+            self._record("pending", session=session, queries=list(queries))
+            for query in queries[:count]:
+                self.downloader.queue_download(query, session=session)
+
+        logger.debug(f"Preparing session {session}: downloading {count} tracks")
+
+    def activate_session(self, session: str) -> None:
+        """
+        Resume downloading for an existing session.
+
+        Args:
+            session: Playlist session key
+        """
+        with self._lock:
+            self._switch_to(session)
+            self._fast_start_remaining = 0
+
+        self.refill()
+
+    def refill(self) -> None:
+        """
+        Queue pending downloads until the buffer target is reached.
+
+        Fast-start upgrades set aside by a session switch are queued
+        behind them.
+        """
+        with self._lock:
+            session = self._session
+            pending = self._pending.get(session)
+            buffered = (
+                self.queue.get_buffered_seconds(session)
+                + len(self._in_flight.get(session, ())) * ESTIMATED_TRACK_DURATION
+            )
+
+            started = 0
+            while pending and buffered < self.target_buffer:
+                fast_start = self._fast_start_remaining > 0
+                self._fast_start_remaining -= int(fast_start)
+                query = pending.popleft()
+                self.downloader.queue_download(
+                    query, fast_start=fast_start, session=session
+                )
+                self._in_flight.setdefault(session, []).append(query)
+                buffered += ESTIMATED_TRACK_DURATION
+                started += 1
+
+            for request in self._upgrades:
+                self.downloader.queue_request(request)
+            self._upgrades.clear()
+
+        if started:
+            logger.debug(
+                f"Buffer at {buffered:.0f}s: queued {started} downloads "
+                f"({len(pending)} pending)"
+            )
+
+    def get_pending_count(self) -> int:
+        """Get the number of playlist entries not yet queued for download."""
+        return len(self._pending.get(self._session, ()))
+
+    def attach_journal(self, journal) -> None:
+        """
+        Record pending playlist changes to a journal from now on.
+
+        Args:
+            journal: QueueJournal receiving the changes
+        """
+        self._journal = journal
+
+    def restore(self, pending: Dict[str, List[str]]) -> None:
+        """
+        Restore pending playlists from a journal state.
+
+        Queries that were in flight when the state was recorded are part of
+        the pending lists and get downloaded again.
+
+        Args:
+            pending: Pending queries per session key
+        """
+        with self._lock:
+            self._session = self.queue.active_session
+            self._pending = {
+                key: deque(queries)
+                for key, queries in pending.items()
+                if self.queue.has_session(key)
+            }
+            self._in_flight = {}
+
+    def checkpoint(self, write: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Capture queue and scheduler state while both are frozen.
+
+        Args:
+            write: Called with the combined state before anything can change
+        """
+        with self._lock, self.queue.frozen():
+            state = self.queue.snapshot()
+            state["pending"] = {
+                key: self._in_flight.get(key, []) + list(queries)
+                for key, queries in self._pending.items()
+            }
+            write(state)
+
+    def _switch_to(self, session: str) -> None:
+        """
+        Make a session active (lock must be held).
+
+        Downloads queued for other sessions that have not started yet are
+        put back at the front of their session's pending list, and pending
+        lists of evicted sessions are dropped. Queued fast-start upgrades
+        are set aside until the next refill, so they run after the new
+        session's first downloads instead of being lost.
+        """
+        for request in reversed(self.downloader.clear_pending()):
+            if request.is_upgrade:
+                self._upgrades.insert(0, request)
+                continue
+            key = request.session or self._session
+            self._discard_in_flight(key, request.query)
+            self._pending.setdefault(key, deque()).appendleft(request.query)
+
+        for key in list(self._pending):
+            if key != session and not self.queue.has_session(key):
+                del self._pending[key]
+                self._in_flight.pop(key, None)
+
+        self._session = session
+
+    def _on_download_done(self, request: DownloadRequest) -> None:
+        """Account for a finished download and top up the buffer."""
+        if request.is_upgrade:
+            return
+
+        with self._lock:
+            key = request.session or self._session
+            self._discard_in_flight(key, request.query)
+            self._record("done", session=key, query=request.query)
+        self.refill()
+
+    def _discard_in_flight(self, session: str, query: str) -> None:
+        """Forget an in-flight download (lock must be held)."""
+        in_flight = self._in_flight.get(session)
+        if in_flight and query in in_flight:
+            in_flight.remove(query)
+
+    def _record(self, op: str, **fields: Any) -> None:
+        """Record a change to the attached journal (lock must be held)."""
+        if self._journal is not None:
+            self._journal.record(op, **fields)
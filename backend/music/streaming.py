@@ -0,0 +1,136 @@
+"""
+Progressive streaming - Tracks audio files that are still being written.
+Lets the player serve a track while its encoder is still producing output.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator
+
+from loguru import logger
+
+from config.settings import STREAMING_CHUNK_SIZE, STREAMING_POLL_INTERVAL
+
+
+class GrowingFileRegistry:
+    """
+    Registry of audio files whose encoder is still running.
+
+    The downloader registers a file before publishing it to the playback
+    queue and marks it finished once the encoder exits. Readers follow the
+    file as it grows until it is finished.
+    """
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(GrowingFileRegistry, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the registry."""
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self._growing: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, path: Path) -> None:
+        """
+        Mark a file as being written.
+
+        Args:
+            path: Path of the file the encoder is writing
+        """
+        with self._lock:
+            self._growing[str(path)] = threading.Event()
+
+    def finish(self, path: Path) -> None:
+        """
+        Mark a file as complete and wake up any readers.
+
+        Args:
+            path: Path of the finished file
+        """
+        with self._lock:
+            event = self._growing.pop(str(path), None)
+
+        if event:
+            event.set()
+            logger.debug(f"Stream complete: {path.name}")
+
+    def is_growing(self, path: Path) -> bool:
+        """
+        Check whether a file is still being written.
+
+        Args:
+            path: Path to check
+
+        Returns:
+            True if the encoder has not finished the file yet
+        """
+        return str(path) in self._growing
+
+    def iter_file(
+        self, path: Path, chunk_size: int = STREAMING_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Read a file from the start, following it while it grows.
+
+        Args:
+            path: Path of the file to read
+            chunk_size: Maximum bytes per chunk
+
+        Yields:
+            Chunks of file content until the file is complete
+        """
+        with self._lock:
+            event = self._growing.get(str(path))
+
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if chunk:
+                    yield chunk
+                    continue
+
+                if event is None or event.is_set():
+                    # Writer is done: drain whatever was flushed last
+                    rest = f.read()
+                    if rest:
+                        yield rest
+                    return
+
+                event.wait(STREAMING_POLL_INTERVAL)
+
+    def wait_for_data(
+        self,
+        path: Path,
+        min_bytes: int,
+        is_alive: Callable[[], bool],
+        timeout: float,
+    ) -> bool:
+        """
+        Wait until a growing file holds enough data to start playback.
+
+        Args:
+            path: Path of the file being written
+            min_bytes: Bytes required before the file is considered playable
+            is_alive: Callable returning False once the writer has exited
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the file reached min_bytes
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if path.exists() and path.stat().st_size >= min_bytes:
+                return True
+            if not is_alive():
+                return path.exists() and path.stat().st_size > 0
+            time.sleep(STREAMING_POLL_INTERVAL)
+        return False
@@ -0,0 +1,104 @@
+"""
+Waveform peaks - Compact min/max envelopes for drawing seek bars.
+Computed once per track from decoded PCM and stored next to the audio file.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+from loguru import logger
+
+from music.formats import get_peaks_path
+
+
+@dataclass
+class Waveform:
+    """
+    Peaks and duration of a track.
+
+    Attributes:
+        duration: Track length in seconds, measured from the decoded audio
+        peaks: (count, 2) int8 array of min/max sample values per bucket
+    """
+
+    duration: float
+    peaks: np.ndarray
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize as JSON-friendly data (peaks flattened min, max, ...)."""
+        return {
+            "duration": round(self.duration, 3),
+            "count": len(self.peaks),
+            "peaks": self.peaks.ravel().tolist(),
+        }
+
+    def to_bytes(self) -> bytes:
+        """Serialize peaks as interleaved int8 min/max pairs."""
+        return self.peaks.tobytes()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Waveform":
+        """Rebuild a waveform from to_dict output."""
+        peaks = np.asarray(data["peaks"], dtype=np.int8).reshape(-1, 2)
+        return cls(duration=float(data["duration"]), peaks=peaks)
+
+
+def compute_peaks(samples: np.ndarray, count: int) -> np.ndarray:
+    """
+    Reduce 16-bit mono samples to min/max pairs over equal-width buckets.
+
+    Args:
+        samples: int16 PCM samples
+        count: Number of buckets
+
+    Returns:
+        (count, 2) int8 array scaled to -127..127 (fewer rows for very
+        short input)
+    """
+    if samples.size == 0:
+        return np.zeros((0, 2), dtype=np.int8)
+
+    count = min(count, samples.size)
+    starts = np.linspace(0, samples.size, count, endpoint=False).astype(np.intp)
+    mins = np.minimum.reduceat(samples, starts)
+    maxs = np.maximum.reduceat(samples, starts)
+
+    peaks = np.stack([mins, maxs], axis=1).astype(np.float32)
+    return np.round(peaks * (127 / 32768)).astype(np.int8)
+
+
+def save_waveform(audio_path: Path, waveform: Waveform) -> None:
+    """
+    Store a waveform next to its audio file.
+
+    Args:
+        audio_path: Path of the audio file
+        waveform: Computed waveform
+    """
+    with open(get_peaks_path(audio_path), "w", encoding="utf-8") as f:
+        json.dump(waveform.to_dict(), f, separators=(",", ":"))
+
+
+def load_waveform(audio_path: Path) -> Optional[Waveform]:
+    """
+    Load the stored waveform of an audio file.
+
+    Args:
+        audio_path: Path of the audio file
+
+    Returns:
+        The waveform, or None if it has not been computed
+    """
+    peaks_path = get_peaks_path(audio_path)
+    if not peaks_path.exists():
+        return None
+
+    try:
+        with open(peaks_path, "r", encoding="utf-8") as f:
+            return Waveform.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable peaks for {audio_path.name}: {e}")
+        return None
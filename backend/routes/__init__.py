@@ -1,5 +1,6 @@
 """Routes package - API endpoint definitions."""
 
+from .audio import AudioFastPath
 from .configs import router as configs_router
 from .game import router as game_router
 from .player import router as player_router
@@ -8,4 +9,5 @@ __all__ = [
     "configs_router",
     "game_router",
     "player_router",
+    "AudioFastPath",
 ]
@@ -0,0 +1,134 @@
+"""
+Audio fast path - Serves track files as raw ASGI ahead of the middleware stack.
+"""
+
+import os
+import re
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.file_transfer import (
+    RangeNotSatisfiable,
+    etag_matches,
+    parse_range_header,
+    send_file,
+)
+from core.monitoring import update_activity
+from music.formats import get_media_type
+from music.queue import Track
+from routes.player import music_player_service
+
+TRACK_PATH = re.compile(r"^/player/tracks/([^/]+)$")
+
+
+def _resolve(track_id: str) -> Optional[Track]:
+    """Look up a complete, servable track (blocking)."""
+    track = music_player_service.prepare_track(music_player_service.get_track(track_id))
+    if track is None or track.etag is None:
+        return None
+    return track
+
+
+def _open_file(track: Track, quality: str) -> Tuple[Optional[str], str, int]:
+    """Get the file to send, its served quality and size (blocking)."""
+    path, served = music_player_service.get_track_file(track, quality)
+    try:
+        return str(path), served, os.stat(path).st_size
+    except OSError:
+        return None, served, 0
+
+
+class AudioFastPath:
+    """
+    Raw ASGI handler for GET/HEAD /player/tracks/{id}.
+
+    Registered as the outermost middleware, so seeks and preloads skip the
+    inner middleware and routing. Files are sent with zero-copy send when
+    the server supports it, single and multiple byte ranges are served
+    directly, and If-None-Match/If-Range use the track's content-hash ETag.
+    The quality parameter and Save-Data header select a rendition, as in
+    the regular route.
+
+    Unknown tracks, missing files, invalid qualities and tracks still being
+    encoded fall through to the regular /player/tracks route.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        match = TRACK_PATH.match(scope["path"])
+        if match is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        version = query.get("v", [None])[0]
+        requested = query.get("quality", [None])[0]
+        save_data = request_headers.get("save-data", "").lower() == "on"
+        try:
+            quality = music_player_service.resolve_quality(requested, save_data)
+        except ValueError:
+            await self.app(scope, receive, send)
+            return
+
+        track = await run_in_threadpool(_resolve, match.group(1))
+        if track is None:
+            await self.app(scope, receive, send)
+            return
+
+        update_activity()
+        headers = music_player_service.track_headers(track, version, quality)
+        if requested is None:
+            headers["Vary"] = "Save-Data"
+        if etag_matches(request_headers.get("if-none-match"), headers["ETag"]):
+            await self._send_empty(send, 304, headers)
+            return
+
+        path, served, size = await run_in_threadpool(_open_file, track, quality)
+        if path is None:
+            await self.app(scope, receive, send)
+            return
+        if served != quality:
+            headers.update(music_player_service.track_headers(track, version, served))
+        etag = headers["ETag"]
+
+        ranges = None
+        if_range = request_headers.get("if-range")
+        if if_range is None or if_range == etag:
+            try:
+                ranges = parse_range_header(request_headers.get("range"), size)
+            except RangeNotSatisfiable:
+                unsatisfiable = {
+                    **headers,
+                    "Content-Range": f"bytes */{size}",
+                    "Content-Length": "0",
+                }
+                await self._send_empty(send, 416, unsatisfiable)
+                return
+
+        await send_file(scope, send, path, size, get_media_type(path), headers, ranges)
+
+    @staticmethod
+    async def _send_empty(send: Send, status: int, headers: dict) -> None:
+        """Send a response without a body."""
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (key.lower().encode("latin-1"), value.encode("latin-1"))
+                    for key, value in headers.items()
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": b""})
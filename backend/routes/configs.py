@@ -15,6 +15,7 @@ from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from groq import AuthenticationError, RateLimitError
 from config.settings import BASE_DIR
+from music.llm_provider import LLMProvider
 
 # Initialize router
 router = APIRouter(prefix="/configs", tags=["Configs"])
@@ -153,6 +154,7 @@ async def update_configs(config_update: ConfigModel) -> JSONResponse:
         test_config(current_config)
 
         save_config(current_config)
+        LLMProvider().invalidate()
         return JSONResponse(content={"message": "Configuration updated successfully"})
     except HTTPException:
         raise
@@ -2,10 +2,26 @@
 Music player routes - API endpoints for music playback control.
 """
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from loguru import logger
+from starlette.concurrency import run_in_threadpool
 
+from config.settings import UPCOMING_DEFAULT_COUNT, UPCOMING_MAX_COUNT
+from core.file_transfer import etag_matches
+from music.formats import QUALITY_ORIGINAL, get_media_type
+from music.queue import Track
+from music.streaming import GrowingFileRegistry
 from routes.services.music_player_service import MusicPlayerService
 
 # Initialize router
@@ -13,15 +29,98 @@ router = APIRouter(prefix="/player", tags=["Music Player"])
 
 # Initialize service
 music_player_service = MusicPlayerService()
+growing_files = GrowingFileRegistry()
+
+
+def _track_url(track: Track, quality: str = QUALITY_ORIGINAL) -> str:
+    """
+    Build the URL of a track resource.
+
+    Tracks with a known content hash get a versioned URL, which is
+    served as immutable; an upgraded track gets a new hash and URL.
+
+    Args:
+        track: Track to link to
+        quality: Quality to request (omitted for the original)
+
+    Returns:
+        Path of the track resource
+    """
+    params = {}
+    if track.etag:
+        params["v"] = track.etag
+    if quality != QUALITY_ORIGINAL:
+        params["quality"] = quality
+
+    url = f"{router.prefix}/tracks/{track.id}"
+    return f"{url}?{urlencode(params)}" if params else url
+
+
+def _track_info(track: Track, quality: str = QUALITY_ORIGINAL) -> dict:
+    """Describe a track for JSON responses."""
+    return {
+        "id": track.id,
+        "url": _track_url(track, quality),
+        "duration": track.duration,
+        "etag": track.etag,
+    }
+
+
+def _resolve_quality(request: Request, quality: Optional[str]) -> str:
+    """
+    Pick the quality to serve from the query parameter or Save-Data header.
+
+    Raises:
+        HTTPException: 400 if the requested quality is not available
+    """
+    save_data = request.headers.get("save-data", "").lower() == "on"
+    try:
+        return music_player_service.resolve_quality(quality, save_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _playable_track(track: Optional[Track]) -> Optional[Track]:
+    """Check a track's file off the event loop (see prepare_track)."""
+    return await run_in_threadpool(music_player_service.prepare_track, track)
+
+
+def _navigation_response(request: Request, track: Track, quality: str) -> Response:
+    """
+    Point the client at a track after next/previous.
+
+    Clients asking for JSON get the track metadata; others are redirected
+    to the track resource, so audio players and HTTP caches keep working
+    with the URL they requested.
+
+    Args:
+        request: Incoming request
+        track: Track that became current
+        quality: Quality the track URL should request
+
+    Returns:
+        JSON metadata or a 303 redirect
+    """
+    if "application/json" in request.headers.get("accept", ""):
+        return JSONResponse(_track_info(track, quality))
+    return RedirectResponse(_track_url(track, quality), status_code=303)
 
 
 @router.get("/next", summary="Get next song in playlist")
-async def get_next_song() -> FileResponse:
+async def get_next_song(
+    request: Request, background_tasks: BackgroundTasks, quality: Optional[str] = None
+) -> Response:
     """
-    Retrieve the next song in the playlist.
+    Advance to the next song in the playlist.
+
+    Args:
+        quality: Audio quality for the track URL ("original" or a rendition
+            name); defaults to the Save-Data preference
 
     Returns:
-        FileResponse: Audio file (MP3) for the next song
+        JSON track metadata (id, url, duration, etag) when the client
+        accepts application/json, otherwise a 303 redirect to the track
+        resource
 
     Behavior:
         - Returns next song from queue
@@ -29,23 +128,25 @@ async def get_next_song() -> FileResponse:
         - Adds current song to play history
 
     Raises:
+        HTTPException: 400 if the quality is not available
         HTTPException: 404 if no songs available or file not found
         HTTPException: 500 if playback fails
     """
     try:
-        file_path = music_player_service.get_next()
+        resolved = _resolve_quality(request, quality)
+        track = music_player_service.get_next()
+        # Buffer top-up and prefetch run in the threadpool after the response
+        background_tasks.add_task(music_player_service.after_navigation)
+        track = await _playable_track(track)
 
-        if not file_path or not file_path.exists():
+        if not track:
+            # Background tasks do not run on errors: top up before the 404
+            await run_in_threadpool(music_player_service.after_navigation)
             logger.warning("Next song file not found or unavailable")
             raise HTTPException(status_code=404, detail="No songs available")
 
-        logger.debug(f"Serving next song: {file_path.name}")
-        return FileResponse(
-            path=str(file_path),
-            media_type="audio/mpeg",
-            filename=file_path.name,
-            headers={"Accept-Ranges": "bytes", "Cache-Control": "no-cache"},
-        )
+        logger.debug(f"Next song: {Path(track.path).name}")
+        return _navigation_response(request, track, resolved)
 
     except HTTPException:
         raise
@@ -55,12 +156,20 @@ async def get_next_song() -> FileResponse:
 
 
 @router.get("/previous", summary="Get previous song in playlist")
-async def get_previous_song() -> FileResponse:
+async def get_previous_song(
+    request: Request, background_tasks: BackgroundTasks, quality: Optional[str] = None
+) -> Response:
     """
-    Retrieve the previous song from play history.
+    Go back to the previous song from play history.
+
+    Args:
+        quality: Audio quality for the track URL ("original" or a rendition
+            name); defaults to the Save-Data preference
 
     Returns:
-        FileResponse: Audio file (MP3) for the previous song
+        JSON track metadata (id, url, duration, etag) when the client
+        accepts application/json, otherwise a 303 redirect to the track
+        resource
 
     Behavior:
         - Returns previous song from history
@@ -68,23 +177,22 @@ async def get_previous_song() -> FileResponse:
         - Maintains playback position in history
 
     Raises:
+        HTTPException: 400 if the quality is not available
         HTTPException: 404 if no previous songs or file not found
         HTTPException: 500 if playback fails
     """
     try:
-        file_path = music_player_service.get_previous()
+        resolved = _resolve_quality(request, quality)
+        track = music_player_service.get_previous()
+        background_tasks.add_task(music_player_service.after_navigation)
+        track = await _playable_track(track)
 
-        if not file_path or not file_path.exists():
+        if not track:
             logger.warning("Previous song file not found or unavailable")
             raise HTTPException(status_code=404, detail="No previous songs available")
 
-        logger.debug(f"Serving previous song: {file_path.name}")
-        return FileResponse(
-            path=str(file_path),
-            media_type="audio/mpeg",
-            filename=file_path.name,
-            headers={"Accept-Ranges": "bytes", "Cache-Control": "no-cache"},
-        )
+        logger.debug(f"Previous song: {Path(track.path).name}")
+        return _navigation_response(request, track, resolved)
 
     except HTTPException:
         raise
@@ -93,6 +201,169 @@ async def get_previous_song() -> FileResponse:
         raise HTTPException(status_code=500, detail="Failed to retrieve previous song")
 
 
+@router.get("/upcoming", summary="List upcoming songs")
+async def get_upcoming_songs(
+    request: Request,
+    n: int = Query(UPCOMING_DEFAULT_COUNT, ge=1, le=UPCOMING_MAX_COUNT),
+    quality: Optional[str] = None,
+) -> dict:
+    """
+    List the songs that will play next, without consuming them.
+
+    Lets the client preload the next track for gapless playback.
+
+    Args:
+        n: Number of upcoming songs to list
+        quality: Audio quality for the track URLs
+
+    Returns:
+        dict: Upcoming tracks in play order
+
+    Example:
+        ```json
+        {
+            "tracks": [
+                {
+                    "id": "3f2a9c1e8b7d",
+                    "url": "/player/tracks/3f2a9c1e8b7d?v=9b1e0c5d7a3f2e4b6c8d0a1f",
+                    "duration": 214.0,
+                    "etag": "9b1e0c5d7a3f2e4b6c8d0a1f"
+                }
+            ]
+        }
+        ```
+    """
+    resolved = _resolve_quality(request, quality)
+    try:
+        tracks = music_player_service.get_upcoming(n)
+        return {"tracks": [_track_info(track, resolved) for track in tracks]}
+    except Exception as e:
+        logger.error(f"Error listing upcoming songs: {e}")
+        raise HTTPException(status_code=500, detail="Failed to list upcoming songs")
+
+
+@router.api_route(
+    "/tracks/{track_id}", methods=["GET", "HEAD"], summary="Get a song by ID"
+)
+async def get_track(
+    request: Request,
+    track_id: str,
+    v: Optional[str] = None,
+    quality: Optional[str] = None,
+) -> Response:
+    """
+    Retrieve a song by its track ID without moving the playback position.
+
+    Complete files carry a content-hash ETag. Requests for the current
+    version (?v=<etag>) are cacheable forever; unversioned requests must
+    revalidate. If-None-Match yields 304 and Range requests are honored.
+    Lower-bitrate renditions are transcoded on first request. Files still
+    being encoded are streamed with chunked transfer at original quality.
+    HEAD is answered with the same headers and no body, like the fast path.
+
+    Args:
+        track_id: Track identifier
+        v: Content version the client expects (the track's ETag)
+        quality: "original" or a rendition name; defaults to the
+            Save-Data preference
+
+    Returns:
+        FileResponse: Audio file for the track (or 304 Not Modified)
+
+    Raises:
+        HTTPException: 400 if the quality is not available
+        HTTPException: 404 if the track is unknown or its file is gone
+    """
+    resolved = _resolve_quality(request, quality)
+    track = await _playable_track(music_player_service.get_track(track_id))
+    if track is None:
+        raise HTTPException(status_code=404, detail="Track not found")
+
+    file_path = Path(track.path)
+    if track.etag is None:
+        headers = music_player_service.growing_headers(track)
+        if request.method == "HEAD":
+            return Response(media_type="audio/mpeg", headers=headers)
+        logger.debug(f"Streaming growing file: {file_path.name}")
+        return StreamingResponse(
+            growing_files.iter_file(file_path),
+            media_type="audio/mpeg",
+            headers=headers,
+        )
+
+    headers = music_player_service.track_headers(track, v, resolved)
+    if quality is None:
+        headers["Vary"] = "Save-Data"
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    file_path, served = await run_in_threadpool(
+        music_player_service.get_track_file, track, resolved
+    )
+    if served != resolved:
+        headers.update(music_player_service.track_headers(track, v, served))
+
+    return FileResponse(
+        path=str(file_path),
+        media_type=get_media_type(file_path),
+        headers=headers,
+    )
+
+
+@router.get("/tracks/{track_id}/peaks", summary="Get a song's waveform peaks")
+async def get_track_peaks(
+    request: Request, track_id: str, v: Optional[str] = None
+) -> Response:
+    """
+    Retrieve precomputed waveform peaks and duration for a track.
+
+    Lets the client draw a seek bar without decoding the audio. Peaks are
+    min/max pairs of the mono signal scaled to -127..127.
+
+    Args:
+        track_id: Track identifier
+        v: Content version the client expects (the track's ETag)
+
+    Returns:
+        JSON with duration, count and flattened peaks; or, when the client
+        accepts application/octet-stream, the raw int8 pairs with the
+        duration in an X-Duration header (with its own "-bin" ETag)
+
+    Example:
+        ```json
+        {"duration": 214.312, "count": 1000, "peaks": [-12, 15, -40, 38]}
+        ```
+
+    Raises:
+        HTTPException: 404 if the track is unknown or not finished yet
+        HTTPException: 500 if the peaks cannot be computed
+    """
+    track = await _playable_track(music_player_service.get_track(track_id))
+    if track is None or track.etag is None:
+        raise HTTPException(status_code=404, detail="Track not available")
+
+    waveform = await run_in_threadpool(music_player_service.get_waveform, track)
+    if waveform is None:
+        raise HTTPException(status_code=500, detail="Failed to compute peaks")
+
+    binary = "application/octet-stream" in request.headers.get("accept", "")
+    headers = music_player_service.track_headers(track, v)
+    headers.pop("Content-Disposition")
+    # Both representations share the URL: caches must key them apart
+    headers["Vary"] = "Accept"
+    if binary:
+        headers["ETag"] = f'{headers["ETag"][:-1]}-bin"'
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if binary:
+        headers["X-Duration"] = f"{waveform.duration:.3f}"
+        return Response(
+            waveform.to_bytes(), media_type="application/octet-stream", headers=headers
+        )
+    return JSONResponse(waveform.to_dict(), headers=headers)
+
+
 @router.get("/status", summary="Get player status")
 async def get_player_status() -> dict:
     """
@@ -103,6 +374,7 @@ async def get_player_status() -> dict:
             - Queue size
             - History size
             - Current song info
+            - Download buffer state
 
     Example:
         ```json
@@ -110,7 +382,9 @@ async def get_player_status() -> dict:
             "queue_size": 5,
             "history_size": 3,
             "has_next": true,
-            "has_previous": true
+            "has_previous": true,
+            "pending_downloads": 42,
+            "buffered_seconds": 960
         }
         ```
     """
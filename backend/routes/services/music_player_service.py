@@ -3,11 +3,22 @@ Music player service - Business logic for music playback management.
 """
 
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
 
 from loguru import logger
 
-from music.queue import PlaybackQueue
+from config.settings import PREFETCH_TRACK_COUNT, SAVE_DATA_QUALITY
+from music.download import MusicDownloader
+from music.formats import QUALITY_ORIGINAL, RENDITION_SUFFIX, file_etag
+from music.prefetch import TrackPrefetcher
+from music.queue import PlaybackQueue, Track
+from music.renditions import RenditionCache
+from music.scheduler import DownloadScheduler
+from music.streaming import GrowingFileRegistry
+from music.waveform import Waveform
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 
 class MusicPlayerService:
@@ -16,32 +27,241 @@ class MusicPlayerService:
     def __init__(self):
         """Initialize the music player service."""
         self.queue = PlaybackQueue()
+        self.scheduler = DownloadScheduler()
+        self.prefetcher = TrackPrefetcher()
+        self.growing_files = GrowingFileRegistry()
+        self.downloader = MusicDownloader()
+        self.renditions = RenditionCache()
 
-    def get_next(self) -> Optional[Path]:
+    def get_next(self) -> Optional[Track]:
         """
         Get the next song from the queue.
 
         Returns:
-            Path to the next song file, or None if no songs available
+            The next track, or None if no songs available
 
         Behavior:
             - If queue is empty, cycles back through played songs
             - Moves current song to played stack
+            - Call after_navigation() afterwards, off the event loop
+        """
+        return self.queue.next_track()
+
+    def after_navigation(self) -> None:
+        """
+        Follow-up work after the cursor moved, kept out of the response path.
+
+        Tops up the download buffer and warms the following tracks into the
+        page cache. Touches the disk, so run it in a worker thread.
+        """
+        self.scheduler.refill()
+        self._prefetch_upcoming()
+
+    def get_upcoming(self, count: int) -> List[Track]:
+        """
+        Get the tracks that will play next, without consuming them.
+
+        Args:
+            count: Maximum number of tracks
+
+        Returns:
+            Upcoming tracks in play order
+        """
+        return self.queue.peek_upcoming(count)
+
+    def get_track(self, track_id: str) -> Optional[Track]:
+        """
+        Look up a track by ID.
+
+        Args:
+            track_id: Track identifier
+
+        Returns:
+            The track, or None if it is not in any playlist
+        """
+        return self.queue.get_track(track_id)
+
+    def prepare_track(self, track: Optional[Track]) -> Optional[Track]:
+        """
+        Check that a track can be served, hashing its file if needed.
+
+        Missing files are reported to the queue. Files still being encoded
+        are returned without a hash. Touches the disk; call from a worker
+        thread in async code.
+
+        Args:
+            track: Track from the playback queue
+
+        Returns:
+            The track, or None if its file is gone
+        """
+        if track is None:
+            return None
+
+        file_path = Path(track.path)
+        if not file_path.exists():
+            self.mark_missing(file_path)
+            return None
+
+        if not self.growing_files.is_growing(file_path):
+            self.ensure_etag(track)
+        return track
+
+    def ensure_etag(self, track: Track) -> str:
+        """
+        Get a track's content hash, computing it if the downloader has not.
+
+        Args:
+            track: A track whose file is complete
+
+        Returns:
+            The track's ETag value (unquoted)
+        """
+        etag = track.etag
+        if etag is None:
+            etag = file_etag(Path(track.path))
+            self.queue.set_etag(track.path, etag)
+        return etag
+
+    def get_waveform(self, track: Track) -> Optional[Waveform]:
+        """
+        Get a track's waveform peaks, computing them if the downloader has not.
+
+        Touches the disk and may run FFmpeg; call from a worker thread in
+        async code.
+
+        Args:
+            track: A track whose file is complete
+
+        Returns:
+            The waveform, or None if it cannot be computed
         """
-        return self.queue.get_next()
+        return self.downloader.get_waveform(Path(track.path))
 
-    def get_previous(self) -> Optional[Path]:
+    def resolve_quality(self, quality: Optional[str], save_data: bool) -> str:
+        """
+        Pick the audio quality to serve.
+
+        An explicit quality wins; otherwise clients sending Save-Data get
+        SAVE_DATA_QUALITY and everyone else the original file.
+
+        Args:
+            quality: Quality requested by the client, if any
+            save_data: Whether the client sent "Save-Data: on"
+
+        Returns:
+            QUALITY_ORIGINAL or a rendition name
+
+        Raises:
+            ValueError: If the requested quality is not available
+        """
+        if quality is None:
+            quality = SAVE_DATA_QUALITY if save_data else QUALITY_ORIGINAL
+            if not self.renditions.is_available(quality):
+                return QUALITY_ORIGINAL
+
+        if not self.renditions.is_available(quality):
+            raise ValueError(f"Unknown quality: {quality}")
+        return quality
+
+    def get_track_file(self, track: Track, quality: str) -> Tuple[Path, str]:
+        """
+        Get the file to serve for a track at a quality.
+
+        Renditions are transcoded on first use, which blocks; call from a
+        worker thread in async code. Falls back to the original file if
+        the rendition cannot be created.
+
+        Args:
+            track: A track whose file is complete
+            quality: Resolved quality
+
+        Returns:
+            Path of the file and the quality actually served
+        """
+        original = Path(track.path)
+        path = self.renditions.get(original, quality)
+        if path is None:
+            return original, QUALITY_ORIGINAL
+        return path, quality
+
+    def track_headers(
+        self, track: Track, version: Optional[str], quality: str = QUALITY_ORIGINAL
+    ) -> Dict[str, str]:
+        """
+        Build the caching and download headers for a complete track.
+
+        Requests for the current version (?v=<etag>) may be cached forever;
+        others must revalidate with the ETag. Renditions derive their ETag
+        from the original's, as they are generated from its content.
+
+        Args:
+            track: Track with a computed ETag
+            version: Version the client asked for, if any
+            quality: Quality being served
+
+        Returns:
+            ETag, Cache-Control and Content-Disposition headers
+        """
+        if quality == QUALITY_ORIGINAL:
+            etag = f'"{track.etag}"'
+            name = Path(track.path).name
+        else:
+            etag = f'"{track.etag}-{quality}"'
+            name = Path(track.path).with_suffix(RENDITION_SUFFIX).name
+
+        return {
+            "ETag": etag,
+            "Cache-Control": (
+                IMMUTABLE_CACHE_CONTROL if version == track.etag else "no-cache"
+            ),
+            "Content-Disposition": self._disposition(name),
+        }
+
+    def growing_headers(self, track: Track) -> Dict[str, str]:
+        """
+        Build the headers for a track whose file is still being encoded.
+
+        Args:
+            track: Track without an ETag yet
+
+        Returns:
+            Cache-Control and Content-Disposition headers
+        """
+        return {
+            "Cache-Control": "no-cache",
+            "Content-Disposition": self._disposition(Path(track.path).name),
+        }
+
+    @staticmethod
+    def _disposition(name: str) -> str:
+        """Build an attachment Content-Disposition for a file name."""
+        if name.isascii():
+            return f'attachment; filename="{name}"'
+        return f"attachment; filename*=utf-8''{quote(name)}"
+
+    def mark_missing(self, file_path: Path) -> None:
+        """
+        Report a song file that disappeared from disk.
+
+        Args:
+            file_path: Path of the missing file
+        """
+        self.queue.set_available(str(file_path), False)
+
+    def get_previous(self) -> Optional[Track]:
         """
         Get the previous song from play history.
 
         Returns:
-            Path to the previous song file, or None if no history
+            The previous track, or None if no history
 
         Behavior:
             - Returns previous song from played stack
             - Moves current song back to queue
+            - Call after_navigation() afterwards, off the event loop
         """
-        return self.queue.get_previous()
+        return self.queue.previous_track()
 
     def get_status(self) -> Dict[str, any]:
         """
@@ -53,12 +273,16 @@ class MusicPlayerService:
                 - history_size: Number of songs in play history
                 - has_next: Whether there's a next song available
                 - has_previous: Whether there's a previous song available
+                - pending_downloads: Playlist entries not yet downloaded
+                - buffered_seconds: Ready playtime ahead of the listener
         """
         status = {
             "queue_size": self.queue.get_queue_size(),
             "history_size": self.queue.get_history_size(),
             "has_next": self.queue.has_next(),
             "has_previous": self.queue.has_previous(),
+            "pending_downloads": self.scheduler.get_pending_count(),
+            "buffered_seconds": round(self.queue.get_buffered_seconds()),
         }
 
         logger.debug(
@@ -67,6 +291,11 @@ class MusicPlayerService:
         )
         return status
 
+    def _prefetch_upcoming(self) -> None:
+        """Warm the next tracks into the OS page cache."""
+        for track in self.queue.peek_upcoming(PREFETCH_TRACK_COUNT):
+            self.prefetcher.warm(Path(track.path))
+
     def clear_queue(self) -> None:
         """Clear the playback queue."""
         self.queue.clear_queue()